@@ -2,14 +2,18 @@
 칼라미디어 B2B 매출 분석 대시보드
 Streamlit 기반 웹 애플리케이션
 """
+import functools
+import html
+import importlib.util
+import io
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import numpy as np
 from datetime import datetime, timedelta
 
 # 유틸리티 함수 임포트
 from utils.data_loader import (
-    load_excel_file, 
     merge_sales_data, 
     enrich_sales_with_client_info,
     clean_and_prepare_data,
@@ -23,13 +27,12 @@ from utils.analysis import (
     predict_future_sales,
     get_top_growing_clients
 )
-from utils.charts import (
-    create_line_chart,
-    create_bar_chart,
-    create_pie_chart,
-    create_growth_chart,
-    create_prediction_chart,
-    create_pareto_chart
+from utils.column_resolver import (
+    DATE_ALIASES as DATE_COLS,
+    AMOUNT_ALIASES as AMOUNT_COLS,
+    CLIENT_ALIASES as CLIENT_COLS,
+    PRODUCT_ALIASES as PRODUCT_COLS,
+    resolve_columns
 )
 from utils.brand_analysis import (
     load_brand_list,
@@ -41,6 +44,394 @@ from utils.brand_analysis import (
     get_brand_statistics
 )
 
+
+# 업로드 파일 캐싱 헬퍼
+# 파일 바이트 + 이름을 키로 사용하여 위젯 조작 등으로 인한 rerun 시
+# 동일한 파일을 다시 파싱/병합하지 않도록 함
+@st.cache_data(show_spinner=False)
+def _read_csv_cached(name: str, data: bytes) -> pd.DataFrame:
+    """업로드된 CSV 바이트를 DataFrame으로 로드 (rerun 시 캐시 사용)
+
+    pyarrow 엔진(C++ 멀티스레드 파서 + Arrow 컬럼 저장)을 우선 사용하고,
+    pyarrow가 처리하지 못하는 파일은 기본 엔진으로 폴백
+    """
+    try:
+        try:
+            return pd.read_csv(io.BytesIO(data), encoding='utf-8-sig',
+                               engine='pyarrow', dtype_backend='pyarrow')
+        except (ImportError, ValueError, pd.errors.ParserError):
+            return pd.read_csv(io.BytesIO(data), encoding='utf-8-sig')
+    except Exception as e:
+        st.error(f"{name} 로드 중 오류 발생: {e}")
+        return None
+
+
+@st.cache_data(show_spinner=False)
+def _read_excel_cached(name: str, data: bytes) -> pd.DataFrame:
+    """업로드된 Excel 바이트를 DataFrame으로 로드 (rerun 시 캐시 사용)
+
+    calamine 엔진(Rust XLSX 파서)이 설치되어 있으면 우선 사용
+    """
+    try:
+        try:
+            return pd.read_excel(io.BytesIO(data), engine='calamine')
+        except ImportError:
+            return pd.read_excel(io.BytesIO(data))
+    except Exception as e:
+        st.error(f"{name} 로드 중 오류 발생: {e}")
+        return None
+
+
+@st.cache_data(show_spinner=False)
+def _merge_sales_cached(files_sig: tuple, blobs: tuple) -> pd.DataFrame:
+    """매출 파일들을 병합 + 정리 (파일 이름/크기 + 바이트를 캐시 키로 사용)"""
+    buffers = []
+    for (name, _size), data in zip(files_sig, blobs):
+        buf = io.BytesIO(data)
+        buf.name = name  # merge_sales_data가 확장자로 포맷을 판별
+        buffers.append(buf)
+
+    merged_df = merge_sales_data(buffers)
+    if merged_df is not None:
+        merged_df = clean_and_prepare_data(merged_df)
+    return merged_df
+
+
+@st.cache_data(show_spinner=False)
+def _enrich_cached(files_sig: tuple, client_sig: tuple,
+                   _sales_df: pd.DataFrame, _client_df: pd.DataFrame) -> pd.DataFrame:
+    """거래처 정보 병합 (파일 시그니처를 캐시 키로 사용, DataFrame은 해싱 제외)"""
+    return enrich_sales_with_client_info(_sales_df, _client_df)
+
+
+# 병합 매출 DataFrame 보관소
+# session_state에 대용량 DataFrame을 직접 넣으면 rerun마다 해싱/복사 비용이
+# 발생하므로, 파일 시그니처를 키로 하는 cache_resource 싱글톤에 보관하고
+# 각 페이지는 참조만 가져다 사용
+@st.cache_resource(show_spinner=False)
+def _merged_sales_holder(sig: tuple) -> dict:
+    """시그니처별 병합 매출 DataFrame을 담는 가변 홀더"""
+    return {}
+
+
+def set_merged_sales(df: pd.DataFrame, sig: tuple):
+    """병합 매출 DataFrame 저장 (시그니처는 session_state에 기록)
+
+    컬럼 프루닝 읽기(_read_cols)를 위해 Snappy 압축 Parquet 버퍼도
+    업로드 시 한 번 직렬화해 함께 보관
+    """
+    st.session_state['sales_sig'] = sig
+    holder = _merged_sales_holder(sig)
+    if 'df' in holder:
+        # 시그니처에는 매출 파일 + 거래처 파일 + 브랜드 파일이 모두 반영되어
+        # 있으므로 동일 시그니처는 동일 내용 — 업로더가 채워진 채 rerun될
+        # 때마다 전체 프레임을 다시 직렬화하지 않음
+        return
+    holder['df'] = df
+    try:
+        buf = io.BytesIO()
+        df.to_parquet(buf, engine='pyarrow', compression='snappy')
+        holder['parquet'] = buf.getvalue()
+    except Exception:
+        # 직렬화 불가능한 dtype 등 — 컬럼 프루닝 없이 전체 프레임 사용
+        holder.pop('parquet', None)
+
+
+def get_merged_sales() -> pd.DataFrame:
+    """저장된 병합 매출 DataFrame 조회 (없으면 None)"""
+    sig = st.session_state.get('sales_sig')
+    if sig is None:
+        return None
+    return _merged_sales_holder(sig).get('df')
+
+
+# 분석 결과 캐싱 래퍼
+# DataFrame 대신 파일 시그니처를 캐시 키로 사용하여, 슬라이더/메뉴 조작에
+# 의한 rerun에서 동일 입력의 groupby 재계산을 dict 조회로 대체
+@st.cache_data(show_spinner=False)
+def _period_sales(df_sig: tuple, date_col: str, amount_col: str, period: str) -> pd.DataFrame:
+    return analyze_sales_by_period(_merged_sales_holder(df_sig)['df'], date_col, amount_col, period)
+
+
+@st.cache_data(show_spinner=False)
+def _growth_rate(df_sig: tuple, date_col: str, amount_col: str, period: str) -> pd.DataFrame:
+    return calculate_growth_rate(_merged_sales_holder(df_sig)['df'], date_col, amount_col, period)
+
+
+@st.cache_data(show_spinner=False)
+def _client_sales(df_sig: tuple, client_col: str, amount_col: str, top_n: int) -> dict:
+    """거래처별 집계를 두 가지 정렬(총매출순/평균거래액순)로 한 번에 준비
+
+    이미 정렬된 집계 프레임을 재사용하므로 rerun마다 nlargest가
+    컬럼 전체를 다시 스캔하지 않는다.
+    """
+    by_total = analyze_sales_by_client(_merged_sales_holder(df_sig)['df'], client_col, amount_col, top_n)
+    if by_total is None:
+        return None
+    return {
+        'by_total': by_total,
+        'by_avg': by_total.sort_values('평균거래액', ascending=False),
+    }
+
+
+@st.cache_data(show_spinner=False)
+def _product_sales(df_sig: tuple, product_col: str, amount_col: str, top_n: int) -> pd.DataFrame:
+    return analyze_sales_by_product(_merged_sales_holder(df_sig)['df'], product_col, amount_col, top_n)
+
+
+@st.cache_data(show_spinner=False)
+def _prediction(df_sig: tuple, date_col: str, amount_col: str, months_ahead: int) -> dict:
+    return predict_future_sales(_merged_sales_holder(df_sig)['df'], date_col, amount_col, months_ahead)
+
+
+@st.cache_data(show_spinner=False)
+def _growing_clients(df_sig: tuple, date_col: str, client_col: str,
+                     amount_col: str, top_n: int) -> pd.DataFrame:
+    return get_top_growing_clients(_merged_sales_holder(df_sig)['df'], date_col, client_col, amount_col, top_n)
+
+
+
+
+@st.cache_data(show_spinner=False)
+def _brand_indices(df_sig: tuple) -> dict:
+    """브랜드 → 행 위치 배열 매핑 (선택 브랜드 상세 분석용)
+
+    selectbox에서 브랜드를 바꿀 때마다 전체 프레임 불리언 마스크를 다시
+    만들지 않도록, groupby 인덱스를 한 번만 구축해 재사용
+    """
+    df = _merged_sales_holder(df_sig)['df']
+    if '브랜드' not in df.columns:
+        return {}
+    return dict(df.groupby('브랜드', observed=True).indices)
+
+
+@st.cache_data(show_spinner=False)
+def _read_cols(df_sig: tuple, columns: tuple) -> pd.DataFrame:
+    """Parquet 버퍼에서 필요한 컬럼만 읽기 (컬럼 프루닝)
+
+    페이지가 만지는 바이트 수를 O(행 × 전체컬럼)에서 O(행 × 필요컬럼)으로
+    줄인다. Parquet 버퍼가 없으면 보관된 프레임에서 슬라이스로 폴백.
+    """
+    holder = _merged_sales_holder(df_sig)
+    data = holder.get('parquet')
+    if data is None:
+        return holder['df'][list(columns)]
+    import pyarrow.parquet as pq
+    return pq.read_table(io.BytesIO(data), columns=list(columns)).to_pandas()
+
+
+@st.cache_data(show_spinner=False)
+def _col_info(df_sig: tuple) -> pd.DataFrame:
+    """컬럼 정보 테이블 (O(행×열) 결측치 스캔을 업로드당 1회로 제한)"""
+    df = _merged_sales_holder(df_sig)['df']
+    return pd.DataFrame({
+        '컬럼명': df.columns,
+        '데이터 타입': df.dtypes.astype(str).values,
+        '결측치': df.isnull().sum().values
+    })
+
+
+@st.cache_data(show_spinner=False)
+def _monthly_series(df_sig: tuple, date_col: str, amount_col: str) -> pd.DataFrame:
+    """월별 매출 실적 집계 (전체 DataFrame 복사 없이 날짜만 지역 변환)"""
+    df = _merged_sales_holder(df_sig)['df']
+    dates = pd.to_datetime(df[date_col], errors='coerce')
+    return (
+        df.assign(_d=dates)
+          .dropna(subset=['_d'])
+          .groupby(pd.Grouper(key='_d', freq='M'))[amount_col]
+          .sum()
+          .reset_index()
+          .rename(columns={'_d': date_col})
+    )
+
+
+@st.cache_data(show_spinner=False)
+def _kpis(df_sig: tuple, cols_items: tuple) -> dict:
+    """페이지 공통 스칼라 KPI 집계 (rerun마다 개별 컬럼 재스캔 방지)"""
+    df = _merged_sales_holder(df_sig)['df']
+    cols = dict(cols_items)
+    kpis = {}
+    if cols.get('client'):
+        kpis['n_clients'] = df[cols['client']].nunique()
+    if cols.get('product'):
+        kpis['n_products'] = df[cols['product']].nunique()
+    if cols.get('amount'):
+        kpis['mean_amt'] = df[cols['amount']].mean()
+    return kpis
+
+
+
+
+
+
+@st.cache_data(show_spinner=False)
+def _ai_summary(df_sig: tuple, cols_items: tuple) -> str:
+    """AI 프롬프트용 데이터 요약 다이제스트 (업로드 시그니처당 1회 생성)
+
+    df.to_string() 샘플 대신 압축된 수치 다이제스트(JSON)를 사용해
+    질문마다 전송/과금되는 프롬프트 토큰 수를 줄인다.
+    """
+    import json
+
+    df = _merged_sales_holder(df_sig)['df']
+    cols = dict(cols_items)
+    date_col = cols.get('date')
+    amount_col = cols.get('amount')
+    client_col = cols.get('client')
+    product_col = cols.get('product')
+
+    date_range = "N/A"
+    if date_col:
+        try:
+            date_range = f"{df[date_col].min()} ~ {df[date_col].max()}"
+        except:
+            pass
+
+    digest = {
+        '분석_기간': date_range,
+        '총_거래건수': len(df),
+        '총_매출액': float(df[amount_col].sum()),
+        '평균_거래액': float(df[amount_col].mean()),
+    }
+
+    if client_col:
+        top = df.groupby(client_col)[amount_col].sum().nlargest(10)
+        digest['총_거래처_수'] = int(df[client_col].nunique())
+        digest['거래처별_매출_TOP10'] = {str(k): float(v) for k, v in top.items()}
+
+    if product_col:
+        top = df.groupby(product_col)[amount_col].sum().nlargest(10)
+        digest['총_제품_수'] = int(df[product_col].nunique())
+        digest['제품별_매출_TOP10'] = {str(k): float(v) for k, v in top.items()}
+
+    if '브랜드' in df.columns:
+        top = df.groupby('브랜드')[amount_col].sum().nlargest(10)
+        digest['총_브랜드_수'] = int(df['브랜드'].nunique())
+        digest['브랜드별_매출_TOP10'] = {str(k): float(v) for k, v in top.items()}
+
+    if date_col:
+        try:
+            months = pd.to_datetime(df[date_col].astype(str).str[:8]).dt.to_period('M')
+            monthly = df.groupby(months)[amount_col].sum().tail(12)
+            digest['최근_12개월_월별_매출'] = {str(k): float(v) for k, v in monthly.items()}
+        except:
+            pass
+
+    contact_cols = [c for c in df.columns if '연락처' in c or '전화' in c or 'TEL' in c.upper()]
+    if contact_cols:
+        digest['사용_가능한_연락처_컬럼'] = contact_cols
+
+    return f"""=== 칼라미디어 매출 데이터 분석 보고서 ===
+
+데이터 컬럼: {', '.join(df.columns.tolist())}
+
+수치 다이제스트(JSON):
+{json.dumps(digest, ensure_ascii=False, indent=1)}
+"""
+
+
+
+# AI 클라이언트 / 응답 캐싱
+# 질문 버튼 클릭마다 SDK를 재초기화하고 동일 프롬프트를 재전송하지 않도록,
+# 클라이언트는 cache_resource로, 응답은 (질문, 데이터 시그니처) 기준으로 메모이제이션
+@st.cache_resource(show_spinner=False)
+def _gemini_model(api_key: str):
+    """Gemini 클라이언트 싱글톤"""
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel('gemini-2.5-flash')
+
+
+@st.cache_resource(show_spinner=False)
+def _openai_client(api_key: str):
+    """OpenAI 클라이언트 싱글톤"""
+    from openai import OpenAI
+    return OpenAI(api_key=api_key)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _ask_gemini(question: str, df_sig: tuple, _api_key: str, _prompt: str) -> str:
+    """동일 질문 + 동일 데이터에 대한 Gemini 응답 재사용 (HTTP 왕복 생략)"""
+    return _gemini_model(_api_key).generate_content(_prompt).text
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _ask_openai(question: str, df_sig: tuple, _api_key: str, _messages: list) -> str:
+    """동일 질문 + 동일 데이터에 대한 OpenAI 응답 재사용"""
+    completion = _openai_client(_api_key).chat.completions.create(
+        model="gpt-4o-mini",
+        messages=_messages
+    )
+    return completion.choices[0].message.content
+
+
+
+@st.cache_data(show_spinner=False)
+def _load_brand_mapping(brand_sig: tuple, _brand_df: pd.DataFrame) -> dict:
+    """브랜드 매핑 추출 (브랜드 파일 시그니처당 1회)"""
+    return load_brand_list(_brand_df)
+
+
+@st.cache_data(show_spinner=False)
+def _with_brand_column(df_sig: tuple, brand_sig: tuple, product_col: str,
+                       _brand_mapping: dict) -> pd.DataFrame:
+    """브랜드 컬럼이 추가된 매출 프레임 (매출+브랜드 시그니처 조합당 1회)
+
+    브랜드 파일이 업로더에 남아 있는 동안 rerun마다 전체 매칭을 반복하지
+    않도록 한다. 보관 중인 원본 프레임은 변경하지 않는다.
+    """
+    df = _merged_sales_holder(df_sig)['df']
+    return add_brand_column(df.copy(), _brand_mapping, product_col)
+
+
+@st.cache_data(show_spinner=False)
+def detect_cols(df_sig: tuple, columns_tuple: tuple) -> dict:
+    """날짜/금액/거래처/제품 컬럼을 한 번만 감지 (페이지별 중복 루프 제거)"""
+    s = set(columns_tuple)
+    return {
+        'date': next((c for c in DATE_COLS if c in s), None),
+        'amount': next((c for c in AMOUNT_COLS if c in s), None),
+        'client': next((c for c in CLIENT_COLS if c in s), None),
+        'product': next((c for c in PRODUCT_COLS if c in s), None),
+    }
+
+
+
+
+@functools.lru_cache(maxsize=1)
+def _charts():
+    """차트 모듈 지연 로딩 (업로드만 하는 세션은 Plotly 임포트 비용을 내지 않음)
+
+    시계열 다운샘플링(LTTB)은 전역 패치가 아니라 utils.charts의 시계열
+    빌더 안에서만 수행된다 — 전역 register_plotly_resampler는 파레토
+    차트처럼 범주형 x축을 쓰는 모든 figure까지 패치해 ValueError를
+    일으키므로 사용하지 않는다.
+    """
+    from utils import charts
+    return charts
+
+
+def show_chart(fig):
+    """Plotly 차트 렌더링 (고밀도 scatter 트레이스는 WebGL로 전환)
+
+    포인트가 수천 개를 넘는 SVG scatter는 DOM이 비대해져 상호작용이
+    멈추므로, 임계치를 넘으면 scattergl로 바꿔 GPU 캔버스에 그린다.
+    """
+    needs_gl = any(
+        t.type == 'scatter' and t.x is not None and len(t.x) > 5000
+        for t in fig.data
+    )
+    if needs_gl:
+        import plotly.graph_objects as go
+        d = fig.to_dict()
+        for t in d['data']:
+            if t.get('type', 'scatter') == 'scatter':
+                t['type'] = 'scattergl'
+        fig = go.Figure(d)
+    st.plotly_chart(fig, use_container_width=True)
+
+
 # 페이지 설정
 st.set_page_config(
     page_title="칼라미디어 매출 분석",
@@ -49,8 +440,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# CSS 스타일
-st.markdown("""
+# CSS 스타일 + 페이지 헤더
+# 스타일/헤더/구분선을 각각 st.markdown으로 보내면 ForwardMsg가 여러 개
+# 발생하므로, 정적 HTML은 하나의 문자열로 묶어 1회만 렌더링
+_PAGE_STYLE = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -80,7 +473,11 @@ st.markdown("""
         margin: 1rem 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+_HEADER_HTML = _PAGE_STYLE + '<div class="main-header">📊 칼라미디어 B2B 매출 분석 대시보드</div><hr/>'
+
+_LOGIN_HEADER_HTML = _PAGE_STYLE + '<div class="main-header">🔐 칼라미디어 매출 분석 시스템</div><hr/>'
 
 
 def check_password():
@@ -108,9 +505,8 @@ def check_password():
     if st.session_state.get("password_correct", False):
         return True
 
-    # 로그인 화면
-    st.markdown('<div class="main-header">🔐 칼라미디어 매출 분석 시스템</div>', unsafe_allow_html=True)
-    st.markdown("---")
+    # 로그인 화면 (스타일 + 헤더 + 구분선을 한 번에 렌더링)
+    st.markdown(_LOGIN_HEADER_HTML, unsafe_allow_html=True)
     
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
@@ -159,13 +555,13 @@ def main():
         st.markdown("### ℹ️ 정보")
         st.markdown(f"**접속 시간**: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
         
-        if 'merged_sales_df' in st.session_state:
+        sidebar_df = get_merged_sales()
+        if sidebar_df is not None:
             st.success(f"✅ 데이터 로드 완료")
-            st.info(f"📊 총 {len(st.session_state['merged_sales_df']):,}건")
+            st.info(f"📊 총 {len(sidebar_df):,}건")
     
-    # 헤더
-    st.markdown('<div class="main-header">📊 칼라미디어 B2B 매출 분석 대시보드</div>', unsafe_allow_html=True)
-    st.markdown("---")
+    # 헤더 (스타일 + 헤더 + 구분선을 한 번에 렌더링)
+    st.markdown(_HEADER_HTML, unsafe_allow_html=True)
     
     # 메뉴별 페이지
     if menu == "📁 데이터 업로드":
@@ -213,18 +609,20 @@ def page_data_upload():
         
         if client_file:
             with st.spinner("거래처 데이터 로딩 중..."):
-                # 파일 형식에 따라 로드
+                # 파일 형식에 따라 로드 (동일 파일이면 캐시 사용)
                 if client_file.name.endswith('.csv'):
-                    client_df = pd.read_csv(client_file, encoding='utf-8-sig')
+                    client_df = _read_csv_cached(client_file.name, client_file.getvalue())
                 else:
-                    client_df = load_excel_file(client_file)
-                
+                    client_df = _read_excel_cached(client_file.name, client_file.getvalue())
+
                 if client_df is not None:
                     st.session_state['client_df'] = client_df
+                    st.session_state['client_sig'] = (client_file.name, client_file.size)
                     st.success(f"✅ 거래처 {len(client_df):,}개 로드 완료")
                     
                     with st.expander("📊 거래처 데이터 미리보기"):
-                        st.dataframe(client_df.head(10), use_container_width=True)
+                        st.dataframe(client_df.head(10).reset_index(drop=True),
+                                     use_container_width=True, hide_index=True)
     
     with col2:
         st.markdown("#### 💰 매출 데이터")
@@ -238,20 +636,50 @@ def page_data_upload():
         
         if sales_files:
             with st.spinner("매출 데이터 로딩 및 병합 중..."):
-                merged_df = merge_sales_data(sales_files)
-                
+                # 파일 이름/크기 + 바이트 시그니처로 캐싱 (동일 업로드면 재병합 생략)
+                files_sig = tuple((f.name, f.size) for f in sales_files)
+                blobs = tuple(f.getvalue() for f in sales_files)
+                merged_df = _merge_sales_cached(files_sig, blobs)
+
                 if merged_df is not None:
-                    # 데이터 정리
-                    merged_df = clean_and_prepare_data(merged_df)
-                    
                     # 거래처 정보 병합
                     if 'client_df' in st.session_state:
-                        merged_df = enrich_sales_with_client_info(
-                            merged_df, 
+                        merged_df = _enrich_cached(
+                            files_sig,
+                            st.session_state.get('client_sig'),
+                            merged_df,
                             st.session_state['client_df']
                         )
-                    
-                    st.session_state['merged_sales_df'] = merged_df
+
+                    # 고카디널리티 문자열 컬럼을 category dtype으로 변환
+                    # (이후 모든 groupby가 정수 코드로 동작하고, 메모리와
+                    # 미리보기 테이블의 Arrow 페이로드도 크게 줄어듦)
+                    for c in ('거래처명', '판매처명', '품명 및 규격', '품목명', '제품명'):
+                        if c in merged_df.columns:
+                            merged_df[c] = merged_df[c].astype('category')
+
+                    # 거래처 병합 여부/대상도 내용에 영향을 주므로 저장
+                    # 시그니처에 함께 포함 (브랜드 경로의 (base, brand) 합성
+                    # 시그니처와 같은 방식 — 거래처 파일이 나중에 올라오거나
+                    # 교체돼도 시그니처가 바뀌어 캐시가 무효화됨)
+                    sales_sig = (files_sig, st.session_state.get('client_sig'))
+                    set_merged_sales(merged_df, sales_sig)
+                    # 브랜드 적용 전의 원본 시그니처 (브랜드 재업로드 시
+                    # 파생 시그니처의 기준이 됨)
+                    st.session_state['sales_base_sig'] = sales_sig
+
+                    # 역할별 컬럼을 업로드 시점에 한 번 확정해 저장
+                    # (필수 역할 누락은 여기서 바로 경고)
+                    resolved = resolve_columns(merged_df)
+                    st.session_state['cols'] = resolved
+                    missing = [role for role, label in
+                               (('date', '날짜'), ('amount', '금액'))
+                               if not resolved[role]]
+                    if missing:
+                        st.warning(
+                            "⚠️ 일부 분석에 필요한 컬럼을 찾지 못했습니다: "
+                            + ", ".join(missing)
+                        )
                     
                     # 요약 정보
                     summary = get_data_summary(merged_df)
@@ -283,40 +711,28 @@ def page_data_upload():
                     
                     # 데이터 미리보기
                     with st.expander("📊 매출 데이터 미리보기"):
-                        st.dataframe(merged_df.head(20), use_container_width=True)
+                        st.dataframe(merged_df.head(20).reset_index(drop=True),
+                                     use_container_width=True, hide_index=True)
                     
-                    # 컬럼 정보
+                    # 컬럼 정보 (결측치 스캔은 캐시되어 rerun마다 재계산하지 않음)
                     with st.expander("📋 컬럼 정보"):
-                        col_info = pd.DataFrame({
-                            '컬럼명': merged_df.columns,
-                            '데이터 타입': merged_df.dtypes.values,
-                            '결측치': merged_df.isnull().sum().values
-                        })
-                        st.dataframe(col_info, use_container_width=True)
+                        st.dataframe(_col_info(sales_sig), use_container_width=True)
 
 
 def page_sales_analysis():
     """매출 분석 페이지"""
     st.markdown('<div class="sub-header">📈 매출 분석</div>', unsafe_allow_html=True)
     
-    if 'merged_sales_df' not in st.session_state:
+    df = get_merged_sales()
+    if df is None:
         st.warning("⚠️ 먼저 데이터를 업로드해주세요.")
         return
     
-    df = st.session_state['merged_sales_df']
-    
     # 날짜 및 금액 컬럼 자동 감지
-    date_col = None
-    for col in ['일자', '날짜', '전표일자', '판매일자', '거래일자']:
-        if col in df.columns:
-            date_col = col
-            break
-    
-    amount_col = None
-    for col in ['합계금액', '공급가액', '금액', '매출금액', '판매금액', '공급가', '판매가', '단가', '금액(공급가액)']:
-        if col in df.columns:
-            amount_col = col
-            break
+    sig = st.session_state['sales_sig']
+    cols = detect_cols(sig, tuple(df.columns))
+    date_col = cols['date']
+    amount_col = cols['amount']
     
     if not date_col or not amount_col:
         st.error("❌ 날짜 또는 금액 컬럼을 찾을 수 없습니다.")
@@ -333,7 +749,7 @@ def page_sales_analysis():
         )
     
     # 기간별 매출 분석
-    period_sales = analyze_sales_by_period(df, date_col, amount_col, period)
+    period_sales = _period_sales(sig, date_col, amount_col, period)
     
     if period_sales is not None:
         # 메트릭
@@ -349,45 +765,45 @@ def page_sales_analysis():
         with metric_cols[2]:
             st.metric("총 거래건수", f"{total_transactions:,}건")
         with metric_cols[3]:
-            st.metric("평균 거래액", f"{df[amount_col].mean():,.0f}원")
+            st.metric("평균 거래액", f"{_kpis(sig, tuple(cols.items()))['mean_amt']:,.0f}원")
         
         st.markdown("---")
         
         # 매출 추이 차트
         st.markdown("#### 📊 매출 추이")
         period_labels = {'D': '일별', 'W': '주별', 'M': '월별', 'Q': '분기별', 'Y': '연도별'}
-        fig = create_line_chart(
+        fig = _charts().create_line_chart(
             period_sales,
             date_col,
             '매출액',
             f"기간별 매출 추이 ({period_labels[period]})",
             "매출액 (원)"
         )
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig)
         
         # 거래건수 차트
         st.markdown("#### 📦 거래건수 추이")
-        fig2 = create_line_chart(
+        fig2 = _charts().create_line_chart(
             period_sales,
             date_col,
             '거래건수',
             "기간별 거래건수 추이",
             "거래건수"
         )
-        st.plotly_chart(fig2, use_container_width=True)
+        show_chart(fig2)
         
         # 성장률 분석
-        growth_df = calculate_growth_rate(df, date_col, amount_col, period)
+        growth_df = _growth_rate(sig, date_col, amount_col, period)
         if growth_df is not None and '성장률(%)' in growth_df.columns:
             st.markdown("#### 📈 성장률 분석")
-            fig3 = create_growth_chart(
+            fig3 = _charts().create_growth_chart(
                 growth_df,
                 date_col,
                 amount_col,
                 '성장률(%)',
                 "매출액 및 성장률"
             )
-            st.plotly_chart(fig3, use_container_width=True)
+            show_chart(fig3)
         
         # 상세 데이터 테이블
         with st.expander("📋 상세 데이터 보기"):
@@ -398,138 +814,153 @@ def page_client_analysis():
     """거래처 분석 페이지"""
     st.markdown('<div class="sub-header">🎯 거래처 분석</div>', unsafe_allow_html=True)
     
-    if 'merged_sales_df' not in st.session_state:
+    df = get_merged_sales()
+    if df is None:
         st.warning("⚠️ 먼저 데이터를 업로드해주세요.")
         return
     
-    df = st.session_state['merged_sales_df']
-    
-    # 거래처 컬럼 찾기
-    client_col = None
-    for col in ['거래처명', '판매처명', '거래처', '고객명']:
-        if col in df.columns:
-            client_col = col
-            break
-    
-    amount_col = None
-    for col in ['합계금액', '공급가액', '금액', '매출금액', '판매금액', '공급가', '판매가', '단가', '금액(공급가액)']:
-        if col in df.columns:
-            amount_col = col
-            break
+    # 거래처/금액 컬럼 찾기
+    sig = st.session_state['sales_sig']
+    cols = detect_cols(sig, tuple(df.columns))
+    client_col = cols['client']
+    amount_col = cols['amount']
     
     if not client_col or not amount_col:
         st.error("❌ 거래처 또는 금액 컬럼을 찾을 수 없습니다.")
         return
     
     # 분석 옵션
-    top_n = st.slider("상위 거래처 수", 5, 50, 20)
-    
-    # 거래처별 분석
-    client_sales = analyze_sales_by_client(df, client_col, amount_col, top_n)
-    
-    if client_sales is not None:
-        # 주요 메트릭
-        metric_cols = st.columns(4)
-        with metric_cols[0]:
-            st.metric("총 거래처 수", f"{df[client_col].nunique():,}개")
-        with metric_cols[1]:
-            st.metric("상위 거래처 매출", f"{client_sales['총매출액'].sum():,.0f}원")
-        with metric_cols[2]:
-            st.metric("상위 거래처 비중", f"{client_sales['매출비중(%)'].sum():.1f}%")
-        with metric_cols[3]:
-            top_client = client_sales.iloc[0]
-            st.metric("1위 거래처", top_client[client_col])
-        
-        st.markdown("---")
-        
-        # 파레토 차트
-        st.markdown("#### 📊 거래처별 매출 (파레토 차트)")
-        fig1 = create_pareto_chart(
-            client_sales.head(top_n),
-            client_col,
-            '총매출액',
-            '누적비중(%)',
-            "거래처별 매출 및 누적 비중"
-        )
-        st.plotly_chart(fig1, use_container_width=True)
+    # 슬라이더 조작 시 전체 앱이 아닌 이 블록만 rerun (st.fragment)
+    @st.fragment
+    def _render():
+        top_n = st.slider("상위 거래처 수", 5, 50, 20)
+    
+        # 거래처별 분석
+        client_result = _client_sales(sig, client_col, amount_col, top_n)
+    
+        if client_result is not None:
+            client_sales = client_result['by_total']
+            # 주요 메트릭
+            metric_cols = st.columns(4)
+            with metric_cols[0]:
+                st.metric("총 거래처 수", f"{_kpis(sig, tuple(cols.items()))['n_clients']:,}개")
+            with metric_cols[1]:
+                st.metric("상위 거래처 매출", f"{client_sales['총매출액'].sum():,.0f}원")
+            with metric_cols[2]:
+                st.metric("상위 거래처 비중", f"{client_sales['매출비중(%)'].sum():.1f}%")
+            with metric_cols[3]:
+                top_client = client_sales.iloc[0]
+                st.metric("1위 거래처", top_client[client_col])
         
-        col1, col2 = st.columns(2)
+            st.markdown("---")
         
-        with col1:
-            # 상위 거래처 파이 차트
-            st.markdown("#### 🥧 상위 거래처 매출 비중")
-            fig2 = create_pie_chart(
-                client_sales.head(10),
+            # 파레토 차트
+            st.markdown("#### 📊 거래처별 매출 (파레토 차트)")
+            fig1 = _charts().create_pareto_chart(
+                client_sales.head(top_n),
                 client_col,
                 '총매출액',
-                "상위 10개 거래처 매출 분포"
+                '누적비중(%)',
+                "거래처별 매출 및 누적 비중"
             )
-            st.plotly_chart(fig2, use_container_width=True)
+            show_chart(fig1)
         
-        with col2:
-            # 거래처별 평균 거래액
-            st.markdown("#### 💰 평균 거래액 상위 거래처")
-            top_avg = client_sales.nlargest(10, '평균거래액')
-            fig3 = create_bar_chart(
-                top_avg,
-                client_col,
-                '평균거래액',
-                "평균 거래액 Top 10",
-                'h'
-            )
-            st.plotly_chart(fig3, use_container_width=True)
+            col1, col2 = st.columns(2)
         
-        # 고성장 거래처 분석
-        date_col = None
-        for col in ['일자', '날짜', '전표일자', '판매일자', '거래일자']:
-            if col in df.columns:
-                date_col = col
-                break
+            with col1:
+                # 상위 거래처 파이 차트
+                st.markdown("#### 🥧 상위 거래처 매출 비중")
+                fig2 = _charts().create_pie_chart(
+                    client_sales.head(10),
+                    client_col,
+                    '총매출액',
+                    "상위 10개 거래처 매출 분포"
+                )
+                show_chart(fig2)
         
-        if date_col:
-            st.markdown("#### 🚀 고성장 거래처")
-            growing_clients = get_top_growing_clients(df, date_col, client_col, amount_col, 10)
-            if growing_clients is not None and len(growing_clients) > 0:
-                st.dataframe(
-                    growing_clients.style.format({
-                        '최근6개월매출': '{:,.0f}',
-                        '이전6개월매출': '{:,.0f}',
-                        '성장률(%)': '{:.2f}%'
-                    }),
-                    use_container_width=True
+            with col2:
+                # 거래처별 평균 거래액
+                st.markdown("#### 💰 평균 거래액 상위 거래처")
+                top_avg = client_result['by_avg'].head(10)
+                fig3 = _charts().create_bar_chart(
+                    top_avg,
+                    client_col,
+                    '평균거래액',
+                    "평균 거래액 Top 10",
+                    'h'
                 )
+                show_chart(fig3)
         
-        # 상세 데이터 테이블
-        with st.expander("📋 거래처별 상세 데이터"):
-            st.dataframe(
-                client_sales.style.format({
-                    '총매출액': '{:,.0f}',
-                    '평균거래액': '{:,.0f}',
-                    '최대거래액': '{:,.0f}',
-                    '최소거래액': '{:,.0f}',
-                    '매출비중(%)': '{:.2f}%',
-                    '누적비중(%)': '{:.2f}%'
-                }),
-                use_container_width=True
-            )
+            # 고성장 거래처 분석
+            date_col = cols['date']
+        
+            if date_col:
+                st.markdown("#### 🚀 고성장 거래처")
+                growing_clients = _growing_clients(sig, date_col, client_col, amount_col, 10)
+                if growing_clients is not None and len(growing_clients) > 0:
+                    st.dataframe(
+                        growing_clients.style.format({
+                            '최근6개월매출': '{:,.0f}',
+                            '이전6개월매출': '{:,.0f}',
+                            '성장률(%)': '{:.2f}%'
+                        }),
+                        use_container_width=True
+                    )
+        
+            # 상세 데이터 테이블
+            # st-aggrid가 설치된 경우 가상화 렌더링 + row_data 캐싱으로 표시
+            # (NO_UPDATE + 고정 key → rerun 시 재렌더링 비용 최소화)
+            with st.expander("📋 거래처별 상세 데이터"):
+                try:
+                    from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode, JsCode
+
+                    gb = GridOptionsBuilder.from_dataframe(client_sales)
+                    gb.configure_default_column(
+                        type=['numericColumn'],
+                        valueFormatter=JsCode(
+                            "function(params) {"
+                            " return typeof params.value === 'number'"
+                            " ? params.value.toLocaleString('ko-KR')"
+                            " : params.value; }"
+                        )
+                    )
+                    AgGrid(
+                        client_sales,
+                        gridOptions=gb.build(),
+                        update_mode=GridUpdateMode.NO_UPDATE,
+                        fit_columns_on_grid_load=True,
+                        allow_unsafe_jscode=True,
+                        key='client-grid'
+                    )
+                except ImportError:
+                    st.dataframe(
+                        client_sales.style.format({
+                            '총매출액': '{:,.0f}',
+                            '평균거래액': '{:,.0f}',
+                            '최대거래액': '{:,.0f}',
+                            '최소거래액': '{:,.0f}',
+                            '매출비중(%)': '{:.2f}%',
+                            '누적비중(%)': '{:.2f}%'
+                        }),
+                        use_container_width=True
+                    )
+
+    _render()
 
 
 def page_product_analysis():
     """제품 분석 페이지"""
     st.markdown('<div class="sub-header">📦 제품 분석</div>', unsafe_allow_html=True)
     
-    if 'merged_sales_df' not in st.session_state:
+    df = get_merged_sales()
+    if df is None:
         st.warning("⚠️ 먼저 데이터를 업로드해주세요.")
         return
     
-    df = st.session_state['merged_sales_df']
-    
     # 제품 컬럼 찾기
-    product_col = None
-    for col in ['품명 및 규격', '품목명', '제품명', '상품명', '품명', '품목', '제품', '상품', '아이템', '물품', 'Product', 'Item']:
-        if col in df.columns:
-            product_col = col
-            break
+    sig = st.session_state['sales_sig']
+    cols = detect_cols(sig, tuple(df.columns))
+    product_col = cols['product']
     
     if not product_col:
         st.error("❌ 제품 컬럼을 찾을 수 없습니다.")
@@ -542,157 +973,146 @@ def page_product_analysis():
         """)
         return
     
-    amount_col = None
-    for col in ['합계금액', '공급가액', '금액', '매출금액', '판매금액', '공급가', '판매가', '단가', '금액(공급가액)']:
-        if col in df.columns:
-            amount_col = col
-            break
+    amount_col = cols['amount']
     
     # 분석 옵션
-    top_n = st.slider("상위 제품 수", 5, 50, 20)
-    
-    # 제품별 분석
-    product_sales = analyze_sales_by_product(df, product_col, amount_col, top_n)
-    
-    if product_sales is not None:
-        # 주요 메트릭
-        metric_cols = st.columns(4)
-        with metric_cols[0]:
-            st.metric("총 제품 수", f"{df[product_col].nunique():,}개")
-        with metric_cols[1]:
-            st.metric("총 매출액", f"{product_sales['총매출액'].sum():,.0f}원")
-        with metric_cols[2]:
-            st.metric("총 판매건수", f"{product_sales['판매건수'].sum():,}건")
-        with metric_cols[3]:
-            st.metric("평균 단가", f"{product_sales['평균단가'].mean():,.0f}원")
+    # 슬라이더 조작 시 전체 앱이 아닌 이 블록만 rerun (st.fragment)
+    @st.fragment
+    def _render():
+        top_n = st.slider("상위 제품 수", 5, 50, 20)
+    
+        # 제품별 분석
+        product_sales = _product_sales(sig, product_col, amount_col, top_n)
+    
+        if product_sales is not None:
+            # 주요 메트릭
+            metric_cols = st.columns(4)
+            with metric_cols[0]:
+                st.metric("총 제품 수", f"{_kpis(sig, tuple(cols.items()))['n_products']:,}개")
+            with metric_cols[1]:
+                st.metric("총 매출액", f"{product_sales['총매출액'].sum():,.0f}원")
+            with metric_cols[2]:
+                st.metric("총 판매건수", f"{product_sales['판매건수'].sum():,}건")
+            with metric_cols[3]:
+                st.metric("평균 단가", f"{product_sales['평균단가'].mean():,.0f}원")
         
-        st.markdown("---")
+            st.markdown("---")
         
-        col1, col2 = st.columns(2)
+            col1, col2 = st.columns(2)
         
-        with col1:
-            # 상위 제품 매출 차트
-            st.markdown("#### 📊 제품별 매출 순위")
-            fig1 = create_bar_chart(
-                product_sales.head(15),
-                product_col,
-                '총매출액',
-                f"제품별 매출 Top 15",
-                'h'
-            )
-            st.plotly_chart(fig1, use_container_width=True)
+            with col1:
+                # 상위 제품 매출 차트
+                st.markdown("#### 📊 제품별 매출 순위")
+                fig1 = _charts().create_bar_chart(
+                    product_sales.head(15),
+                    product_col,
+                    '총매출액',
+                    f"제품별 매출 Top 15",
+                    'h'
+                )
+                show_chart(fig1)
         
-        with col2:
-            # 제품별 매출 비중
-            st.markdown("#### 🥧 제품별 매출 비중")
-            fig2 = create_pie_chart(
-                product_sales.head(10),
-                product_col,
-                '총매출액',
-                "상위 10개 제품 매출 분포"
-            )
-            st.plotly_chart(fig2, use_container_width=True)
+            with col2:
+                # 제품별 매출 비중
+                st.markdown("#### 🥧 제품별 매출 비중")
+                fig2 = _charts().create_pie_chart(
+                    product_sales.head(10),
+                    product_col,
+                    '총매출액',
+                    "상위 10개 제품 매출 분포"
+                )
+                show_chart(fig2)
         
-        # 상세 데이터 테이블
-        st.markdown("#### 📋 제품별 상세 데이터")
-        # 포맷팅된 데이터프레임 표시
-        styled_product = product_sales.copy()
-        for col in ['총매출액', '평균단가']:
-            if col in styled_product.columns:
-                styled_product[col] = styled_product[col].apply(lambda x: f"{x:,.0f}" if pd.notna(x) else "")
-        if '매출비중(%)' in styled_product.columns:
-            styled_product['매출비중(%)'] = styled_product['매출비중(%)'].apply(lambda x: f"{x:.2f}%" if pd.notna(x) else "")
-        st.dataframe(styled_product, use_container_width=True)
+            # 상세 데이터 테이블
+            st.markdown("#### 📋 제품별 상세 데이터")
+            # 숫자 dtype을 유지한 채 표시 포맷만 적용 (컬럼 정렬 동작 유지)
+            fmt = {c: '{:,.0f}' for c in ('총매출액', '평균단가') if c in product_sales.columns}
+            if '매출비중(%)' in product_sales.columns:
+                fmt['매출비중(%)'] = '{:.2f}%'
+            st.dataframe(product_sales.style.format(fmt, na_rep=''), use_container_width=True)
+
+    _render()
 
 
 def page_prediction():
     """매출 예측 페이지"""
     st.markdown('<div class="sub-header">🔮 매출 예측</div>', unsafe_allow_html=True)
     
-    if 'merged_sales_df' not in st.session_state:
+    df = get_merged_sales()
+    if df is None:
         st.warning("⚠️ 먼저 데이터를 업로드해주세요.")
         return
     
-    df = st.session_state['merged_sales_df']
-    
     # 날짜 및 금액 컬럼 찾기
-    date_col = None
-    for col in ['일자', '날짜', '전표일자', '판매일자', '거래일자']:
-        if col in df.columns:
-            date_col = col
-            break
-    
-    amount_col = None
-    for col in ['합계금액', '공급가액', '금액', '매출금액', '판매금액', '공급가', '판매가', '단가', '금액(공급가액)']:
-        if col in df.columns:
-            amount_col = col
-            break
+    sig = st.session_state['sales_sig']
+    cols = detect_cols(sig, tuple(df.columns))
+    date_col = cols['date']
+    amount_col = cols['amount']
     
     if not date_col or not amount_col:
         st.error("❌ 날짜 또는 금액 컬럼을 찾을 수 없습니다.")
         return
     
     # 예측 옵션
-    months_ahead = st.slider("예측 기간 (개월)", 1, 12, 6)
-    
-    # 매출 예측
-    with st.spinner("매출 예측 중..."):
-        prediction_result = predict_future_sales(df, date_col, amount_col, months_ahead)
-    
-    if prediction_result:
-        # 주요 메트릭
-        st.markdown("#### 📊 최근 매출 평균")
-        metric_cols = st.columns(3)
-        with metric_cols[0]:
-            st.metric("최근 3개월 평균", f"{prediction_result['avg_3m']:,.0f}원")
-        with metric_cols[1]:
-            st.metric("최근 6개월 평균", f"{prediction_result['avg_6m']:,.0f}원")
-        with metric_cols[2]:
-            st.metric("최근 12개월 평균", f"{prediction_result['avg_12m']:,.0f}원")
+    # 슬라이더 조작 시 전체 앱이 아닌 이 블록만 rerun (st.fragment)
+    @st.fragment
+    def _render():
+        months_ahead = st.slider("예측 기간 (개월)", 1, 12, 6)
+    
+        # 매출 예측
+        with st.spinner("매출 예측 중..."):
+            prediction_result = _prediction(sig, date_col, amount_col, months_ahead)
+    
+        if prediction_result:
+            # 주요 메트릭
+            st.markdown("#### 📊 최근 매출 평균")
+            metric_cols = st.columns(3)
+            with metric_cols[0]:
+                st.metric("최근 3개월 평균", f"{prediction_result['avg_3m']:,.0f}원")
+            with metric_cols[1]:
+                st.metric("최근 6개월 평균", f"{prediction_result['avg_6m']:,.0f}원")
+            with metric_cols[2]:
+                st.metric("최근 12개월 평균", f"{prediction_result['avg_12m']:,.0f}원")
         
-        st.markdown("---")
+            st.markdown("---")
         
-        # 추세 정보
-        trend = prediction_result['trend_slope']
-        trend_text = "상승 📈" if trend > 0 else "하락 📉" if trend < 0 else "보합 ➡️"
-        st.info(f"📊 **매출 추세**: {trend_text} (월평균 {abs(trend):,.0f}원)")
+            # 추세 정보
+            trend = prediction_result['trend_slope']
+            trend_text = "상승 📈" if trend > 0 else "하락 📉" if trend < 0 else "보합 ➡️"
+            st.info(f"📊 **매출 추세**: {trend_text} (월평균 {abs(trend):,.0f}원)")
         
-        # 예측 차트
-        st.markdown("#### 🔮 매출 예측 차트")
+            # 예측 차트
+            st.markdown("#### 🔮 매출 예측 차트")
         
-        # 월별 실적 데이터
-        df_copy = df.copy()
-        df_copy[date_col] = pd.to_datetime(df_copy[date_col])
-        monthly_sales = df_copy.groupby(pd.Grouper(key=date_col, freq='M'))[amount_col].sum().reset_index()
-        monthly_sales.columns = [date_col, amount_col]
+            # 월별 실적 데이터 (업로드 시그니처별로 1회만 계산)
+            monthly_sales = _monthly_series(sig, date_col, amount_col)
         
-        # 예측 차트 생성
-        fig = create_prediction_chart(
-            monthly_sales,
-            prediction_result['predictions'],
-            date_col,
-            amount_col,
-            f"향후 {months_ahead}개월 매출 예측"
-        )
-        st.plotly_chart(fig, use_container_width=True)
+            # 예측 차트 생성
+            fig = _charts().create_prediction_chart(
+                monthly_sales,
+                prediction_result['predictions'],
+                date_col,
+                amount_col,
+                f"향후 {months_ahead}개월 매출 예측"
+            )
+            show_chart(fig)
         
-        # 예측 데이터 테이블
-        st.markdown("#### 📋 예측 상세 데이터")
-        pred_df = pd.DataFrame(prediction_result['predictions'])
-        pred_df['date'] = pd.to_datetime(pred_df['date']).dt.strftime('%Y-%m')
-        pred_df.columns = ['예측월', '예측매출액']
+            # 예측 데이터 테이블
+            st.markdown("#### 📋 예측 상세 데이터")
+            pred_df = pd.DataFrame(prediction_result['predictions'])
+            pred_df['date'] = pd.to_datetime(pred_df['date']).dt.strftime('%Y-%m')
+            pred_df.columns = ['예측월', '예측매출액']
         
-        # 포맷팅된 데이터프레임 표시
-        styled_pred = pred_df.copy()
-        if '예측매출액' in styled_pred.columns:
-            styled_pred['예측매출액'] = styled_pred['예측매출액'].apply(lambda x: f"{x:,.0f}원" if pd.notna(x) else "")
-        st.dataframe(styled_pred, use_container_width=True)
+            # 숫자 dtype을 유지한 채 표시 포맷만 적용
+            st.dataframe(pred_df.style.format({'예측매출액': '{:,.0f}원'}, na_rep=''), use_container_width=True)
         
-        # 총 예측 매출
-        total_predicted = sum([p['predicted_sales'] for p in prediction_result['predictions']])
-        st.success(f"💰 **향후 {months_ahead}개월 예상 총 매출**: {total_predicted:,.0f}원")
-    else:
-        st.error("❌ 예측 데이터가 부족합니다.")
+            # 총 예측 매출
+            total_predicted = sum([p['predicted_sales'] for p in prediction_result['predictions']])
+            st.success(f"💰 **향후 {months_ahead}개월 예상 총 매출**: {total_predicted:,.0f}원")
+        else:
+            st.error("❌ 예측 데이터가 부족합니다.")
+
+    _render()
 
 
 def page_ai_query():
@@ -743,115 +1163,21 @@ def page_ai_query():
         st.info("🤖 현재 **OpenAI GPT-4o-mini** 모델을 사용하고 있습니다.")
         llm_provider = "openai"
     
-    if 'merged_sales_df' not in st.session_state:
+    df = get_merged_sales()
+    if df is None:
         st.warning("⚠️ 먼저 데이터를 업로드해주세요.")
         return
     
-    df = st.session_state['merged_sales_df']
-    
-    # 금액 컬럼 찾기
-    amount_col = None
-    for col in ['합계금액', '공급가액', '금액', '매출금액', '판매금액']:
-        if col in df.columns:
-            amount_col = col
-            break
+    # 금액/거래처/제품/날짜 컬럼 찾기
+    cols = detect_cols(st.session_state['sales_sig'], tuple(df.columns))
+    amount_col = cols['amount']
     
     if not amount_col:
         st.error("❌ 금액 컬럼을 찾을 수 없습니다.")
         return
     
-    # 거래처 컬럼 찾기
-    client_col = None
-    for col in ['판매처명', '거래처명', '거래처', '고객명']:
-        if col in df.columns:
-            client_col = col
-            break
-    
-    # 제품 컬럼 찾기
-    product_col = None
-    for col in ['품명 및 규격', '품명', '제품명', '상품명']:
-        if col in df.columns:
-            product_col = col
-            break
-    
-    # 날짜 컬럼 찾기
-    date_cols = ['일자', '날짜', '전표일자', '판매일자', '거래일자']
-    date_col = None
-    for col in date_cols:
-        if col in df.columns:
-            date_col = col
-            break
-    
-    # 상세한 데이터 분석
-    date_range = "N/A"
-    if date_col:
-        try:
-            date_range = f"{df[date_col].min()} ~ {df[date_col].max()}"
-        except:
-            pass
-    
-    # 전체 데이터 통계 생성
-    total_sales = df[amount_col].sum()
-    total_transactions = len(df)
-    avg_transaction = df[amount_col].mean()
-    
-    # 거래처별 분석
-    client_analysis = ""
-    if client_col:
-        top_clients = df.groupby(client_col)[amount_col].agg(['sum', 'count']).sort_values('sum', ascending=False).head(10)
-        client_analysis = f"""\n\n거래처별 매출 TOP 10:
-{top_clients.to_string()}
-
-총 거래처 수: {df[client_col].nunique()}개"""
-    
-    # 제품별 분석
-    product_analysis = ""
-    if product_col:
-        top_products = df.groupby(product_col)[amount_col].agg(['sum', 'count']).sort_values('sum', ascending=False).head(10)
-        product_analysis = f"""\n\n제품별 매출 TOP 10:
-{top_products.to_string()}
-
-총 제품 수: {df[product_col].nunique()}개"""
-    
-    # 브랜드별 분석
-    brand_analysis = ""
-    if '브랜드' in df.columns:
-        top_brands = df.groupby('브랜드')[amount_col].agg(['sum', 'count']).sort_values('sum', ascending=False).head(10)
-        brand_analysis = f"""\n\n브랜드별 매출 TOP 10:
-{top_brands.to_string()}
-
-총 브랜드 수: {df['브랜드'].nunique()}개"""
-    
-    # 기간별 분석 (월별)
-    time_analysis = ""
-    if date_col:
-        try:
-            df_temp = df.copy()
-            df_temp['년월'] = pd.to_datetime(df_temp[date_col].astype(str).str[:8]).dt.to_period('M')
-            monthly_sales = df_temp.groupby('년월')[amount_col].sum().tail(12)
-            time_analysis = f"""\n\n최근 12개월 월별 매출:
-{monthly_sales.to_string()}"""
-        except:
-            pass
-    
-    # 연락처 정보
-    contact_info = ""
-    contact_cols = [col for col in df.columns if '연락처' in col or '전화' in col or 'TEL' in col.upper()]
-    if contact_cols:
-        contact_info = f"\n\n사용 가능한 연락처 컬럼: {', '.join(contact_cols)}"
-    
-    summary_text = f"""=== 칼라미디어 매출 데이터 분석 보고서 ===
-
-📊 전체 개요:
-- 분석 기간: {date_range}
-- 총 거래 건수: {total_transactions:,}건
-- 총 매출액: {total_sales:,.0f}원
-- 평균 거래액: {avg_transaction:,.0f}원
-- 데이터 컬럼: {', '.join(df.columns.tolist())}{client_analysis}{product_analysis}{brand_analysis}{time_analysis}{contact_info}
-
-📌 샘플 데이터 (최근 5건):
-{df.tail(5).to_string()}
-"""
+    # 데이터 요약 다이제스트 (압축 JSON, df_sig당 1회 계산)
+    summary_text = _ai_summary(st.session_state['sales_sig'], tuple(cols.items()))
     
     # 질문 입력
     question = st.text_area(
@@ -869,10 +1195,6 @@ def page_ai_query():
                     # Gemini 사용
                     if llm_provider == "gemini":
                         try:
-                            import google.generativeai as genai
-                            genai.configure(api_key=gemini_key)
-                            model = genai.GenerativeModel('gemini-2.5-flash')
-                            
                             prompt = f"""당신은 칼라미디어의 매출 데이터 분석 전문가입니다. 
 
 위 데이터는 칼라미디어의 실제 B2B 매출 거래 데이터입니다. 아래의 상세한 분석 자료를 기반으로 사용자 질문에 정확하게 답변해주세요.
@@ -896,8 +1218,10 @@ def page_ai_query():
 - 필요시 표 형식이나 리스트 형식 사용
 - 추가 인사이트 제공 (데이터 기반)
 """
-                            response = model.generate_content(prompt)
-                            response_text = response.text
+                            response_text = _ask_gemini(
+                                question, st.session_state['sales_sig'],
+                                gemini_key, prompt
+                            )
                         except Exception as gemini_error:
                             st.warning(f"⚠️ Gemini API 오류: {gemini_error}")
                             # OpenAI로 fallback
@@ -908,12 +1232,7 @@ def page_ai_query():
                     # OpenAI 사용
                     if llm_provider == "openai" and not response_text:
                         try:
-                            from openai import OpenAI
-                            client = OpenAI(api_key=openai_key)
-                            
-                            completion = client.chat.completions.create(
-                                model="gpt-4o-mini",
-                                messages=[
+                            messages = [
                                     {"role": "system", "content": """당신은 칼라미디어의 매출 데이터 분석 전문가입니다.
 
 필수 준수사항:
@@ -925,9 +1244,11 @@ def page_ai_query():
 6. 데이터에 없는 내용은 '현재 데이터로는 확인할 수 없습니다'라고 명시하세요
 7. 한국어로 명확하고 실용적으로 답변하세요"""},
                                     {"role": "user", "content": f"{summary_text}\n\n사용자 질문: {question}"}
-                                ]
+                            ]
+                            response_text = _ask_openai(
+                                question, st.session_state['sales_sig'],
+                                openai_key, messages
                             )
-                            response_text = completion.choices[0].message.content
                         except Exception as openai_error:
                             st.error(f"❌ OpenAI API 오류: {openai_error}")
                     
@@ -971,48 +1292,57 @@ def page_brand_upload():
     if brand_file:
         with st.spinner("브랜드 리스트 로딩 중..."):
             try:
-                # 파일 형식에 따라 로드
+                # 파일 형식에 따라 로드 (동일 파일이면 캐시 사용)
                 if brand_file.name.endswith('.csv'):
-                    brand_df = pd.read_csv(brand_file, encoding='utf-8-sig')
+                    brand_df = _read_csv_cached(brand_file.name, brand_file.getvalue())
                 else:
-                    brand_df = load_excel_file(brand_file)
+                    brand_df = _read_excel_cached(brand_file.name, brand_file.getvalue())
                 
                 if brand_df is not None:
                     st.session_state['brand_df'] = brand_df
                     
-                    # 브랜드 리스트 추출
-                    brand_mapping = load_brand_list(brand_df)
+                    # 브랜드 리스트 추출 (동일 파일이면 캐시 사용)
+                    brand_sig = (brand_file.name, brand_file.size)
+                    brand_mapping = _load_brand_mapping(brand_sig, brand_df)
                     st.session_state['brand_mapping'] = brand_mapping
                     
                     st.success(f"✅ 브랜드 {len(brand_mapping)}개 로드 완료")
                     
-                    # 브랜드 목록 표시
+                    # 브랜드 목록 표시 (대표 브랜드명 + 유사표기 개수)
+                    # 브랜드당 st.markdown을 호출하면 프론트엔드 메시지가 N개
+                    # 발생하므로, CSS 3단 컬럼 HTML 하나로 묶어 1회만 렌더링
                     st.markdown("#### 📋 등록된 브랜드")
-                    
-                    # 3열로 표시 (대표 브랜드명만)
-                    cols = st.columns(3)
-                    for idx, brand in enumerate(brand_mapping.keys()):
-                        col_idx = idx % 3
-                        with cols[col_idx]:
-                            # 유사표기 개수 표시
-                            variant_count = len(brand_mapping[brand])
-                            st.markdown(f"✓ **{brand}** ({variant_count})")
+                    # 업로드된 셀 내용이 그대로 DOM에 들어가지 않도록
+                    # 브랜드명은 HTML 이스케이프
+                    brand_items = ''.join(
+                        f'<div>✓ <b>{html.escape(str(brand))}</b> ({len(variants)})</div>'
+                        for brand, variants in brand_mapping.items()
+                    )
+                    st.markdown(
+                        f'<div style="columns: 3;">{brand_items}</div>',
+                        unsafe_allow_html=True
+                    )
                     
                     # 매출 데이터가 있으면 브랜드 컬럼 추가
-                    if 'merged_sales_df' in st.session_state:
+                    merged_df = get_merged_sales()
+                    if merged_df is not None:
                         with st.spinner("매출 데이터에 브랜드 정보 추가 중..."):
-                            sales_df = st.session_state['merged_sales_df'].copy()
-                            
                             # 제품 컬럼 찾기
-                            product_col = None
-                            for col in ['품명 및 규격', '품목명', '제품명', '상품명', '품명', '품목', '제품', '상품', '아이템', '물품', 'Product', 'Item']:
-                                if col in sales_df.columns:
-                                    product_col = col
-                                    break
+                            product_col = detect_cols(
+                                st.session_state['sales_sig'], tuple(merged_df.columns)
+                            )['product']
                             
                             if product_col:
-                                sales_df = add_brand_column(sales_df, brand_mapping, product_col)
-                                st.session_state['merged_sales_df'] = sales_df
+                                # 단일 패턴 매칭 한 번으로 전 행 브랜드 식별
+                                # (동일 매출+브랜드 조합이면 캐시 사용)
+                                # 브랜드가 바뀌면 시그니처도 바뀌어야
+                                # df_sig 키 캐시들이 함께 무효화됨
+                                base_sig = st.session_state.get(
+                                    'sales_base_sig', st.session_state['sales_sig'])
+                                sales_df = _with_brand_column(
+                                    base_sig, brand_sig, product_col, brand_mapping)
+                                set_merged_sales(sales_df, (base_sig, brand_sig))
+                                st.session_state['sales_base_sig'] = base_sig
                                 
                                 # 브랜드 통계
                                 brand_stats = get_brand_statistics(sales_df, '브랜드')
@@ -1035,7 +1365,7 @@ def page_brand_upload():
                             else:
                                 st.warning("⚠️ 제품명 컬럼을 찾을 수 없어 브랜드 매칭을 건너뜁니다.")
                                 st.error("📌 **찾고 있는 컬럼명**: 품명 및 규격, 품목명, 제품명, 상품명, 품명, 품목, 제품, 상품, 아이템, 물품, Product, Item")
-                                st.info("📋 **실제 컬럼**: " + ", ".join(sales_df.columns.tolist()))
+                                st.info("📋 **실제 컬럼**: " + ", ".join(merged_df.columns.tolist()))
                                 st.info("""
 💡 **해결 방법**:
 1. 매출 데이터 CSV 파일의 헤더에서 제품 컬럼명을 위 목록 중 하나로 변경하세요
@@ -1053,210 +1383,230 @@ def page_brand_analysis():
     st.markdown('<div class="sub-header">🏷️ 브랜드별 매출 분석</div>', unsafe_allow_html=True)
     
     # 브랜드 리스트 확인
-    if 'brand_mapping' not in st.session_state or 'merged_sales_df' not in st.session_state:
+    df = get_merged_sales()
+    if 'brand_mapping' not in st.session_state or df is None:
         st.warning("⚠️ 먼저 브랜드 리스트와 매출 데이터를 업로드해주세요.")
         st.info("💡 사이드바에서 '📁 데이터 업로드' → '🏷️ 브랜드 업로드' 메뉴를 이용하세요.")
         return
     
-    df = st.session_state['merged_sales_df']
-    
     # 브랜드 컬럼 확인
     if '브랜드' not in df.columns:
         st.error("❌ 매출 데이터에 브랜드 정보가 없습니다. 브랜드 리스트를 다시 업로드해주세요.")
         return
     
     # 금액 컬럼 찾기
-    amount_col = None
-    for col in ['합계금액', '공급가액', '금액', '매출금액', '판매금액', '공급가', '판매가', '단가', '금액(공급가액)']:
-        if col in df.columns:
-            amount_col = col
-            break
+    cols = detect_cols(st.session_state['sales_sig'], tuple(df.columns))
+    amount_col = cols['amount']
     
     if not amount_col:
         st.error("❌ 금액 컬럼을 찾을 수 없습니다.")
         return
     
-    # 분석 옵션
-    top_n = st.slider("상위 브랜드 수", 5, 30, 15)
-    
-    # 브랜드별 매출 분석
-    brand_sales = analyze_sales_by_brand(df, '브랜드', amount_col, top_n)
+    # 이 페이지가 사용하는 컬럼만 Parquet에서 읽어 사용 (컬럼 프루닝)
+    wanted = tuple(dict.fromkeys(
+        c for c in ('브랜드', amount_col, cols['date'], cols['product']) if c))
+    df = _read_cols(st.session_state['sales_sig'], wanted)
     
-    if brand_sales is not None:
-        # 주요 메트릭
-        total_brands = df['브랜드'].nunique()
-        total_sales = brand_sales['총매출액'].sum()
-        top_brand = brand_sales.iloc[0]
-        
-        metric_cols = st.columns(4)
-        with metric_cols[0]:
-            st.metric("총 브랜드 수", f"{total_brands}개")
-        with metric_cols[1]:
-            st.metric("상위 브랜드 매출", f"{total_sales:,.0f}원")
-        with metric_cols[2]:
-            st.metric("1위 브랜드", top_brand['브랜드'])
-        with metric_cols[3]:
-            st.metric("1위 매출액", f"{top_brand['총매출액']:,.0f}원")
-        
-        st.markdown("---")
+    # 분석 옵션
+    # 슬라이더 조작 시 전체 앱이 아닌 이 블록만 rerun (st.fragment)
+    @st.fragment
+    def _render():
+        top_n = st.slider("상위 브랜드 수", 5, 30, 15)
+    
+        # 브랜드별 매출 분석
+        brand_sales = analyze_sales_by_brand(df, '브랜드', amount_col, top_n)
+    
+        if brand_sales is not None:
+            # 주요 메트릭
+            total_brands = df['브랜드'].nunique()
+            total_sales = brand_sales['총매출액'].sum()
+            top_brand = brand_sales.iloc[0]
         
-        # 파레토 차트
-        st.markdown("#### 📊 브랜드별 매출 (파레토 차트)")
-        fig1 = create_pareto_chart(
-            brand_sales,
-            '브랜드',
-            '총매출액',
-            '누적비중(%)',
-            "브랜드별 매출 및 누적 비중"
-        )
-        st.plotly_chart(fig1, use_container_width=True)
+            metric_cols = st.columns(4)
+            with metric_cols[0]:
+                st.metric("총 브랜드 수", f"{total_brands}개")
+            with metric_cols[1]:
+                st.metric("상위 브랜드 매출", f"{total_sales:,.0f}원")
+            with metric_cols[2]:
+                st.metric("1위 브랜드", top_brand['브랜드'])
+            with metric_cols[3]:
+                st.metric("1위 매출액", f"{top_brand['총매출액']:,.0f}원")
         
-        col1, col2 = st.columns(2)
+            st.markdown("---")
         
-        with col1:
-            # 브랜드별 매출 순위
-            st.markdown("#### 📊 브랜드별 매출 순위")
-            fig2 = create_bar_chart(
-                brand_sales.head(15),
+            # 파레토 차트
+            st.markdown("#### 📊 브랜드별 매출 (파레토 차트)")
+            fig1 = _charts().create_pareto_chart(
+                brand_sales,
                 '브랜드',
                 '총매출액',
-                "브랜드별 매출 Top 15",
-                'h'
+                '누적비중(%)',
+                "브랜드별 매출 및 누적 비중"
             )
-            st.plotly_chart(fig2, use_container_width=True)
+            show_chart(fig1)
         
-        with col2:
-            # 브랜드별 매출 비중
-            st.markdown("#### 🥧 브랜드별 매출 비중")
-            fig3 = create_pie_chart(
-                brand_sales.head(10),
-                '브랜드',
-                '총매출액',
-                "상위 10개 브랜드 매출 분포"
-            )
-            st.plotly_chart(fig3, use_container_width=True)
+            col1, col2 = st.columns(2)
+        
+            with col1:
+                # 브랜드별 매출 순위
+                st.markdown("#### 📊 브랜드별 매출 순위")
+                fig2 = _charts().create_bar_chart(
+                    brand_sales.head(15),
+                    '브랜드',
+                    '총매출액',
+                    "브랜드별 매출 Top 15",
+                    'h'
+                )
+                show_chart(fig2)
+        
+            with col2:
+                # 브랜드별 매출 비중
+                st.markdown("#### 🥧 브랜드별 매출 비중")
+                fig3 = _charts().create_pie_chart(
+                    brand_sales.head(10),
+                    '브랜드',
+                    '총매출액',
+                    "상위 10개 브랜드 매출 분포"
+                )
+                show_chart(fig3)
         
-        # 브랜드별 시계열 추이
-        date_col = None
-        for col in ['일자', '날짜', '전표일자', '판매일자', '거래일자']:
-            if col in df.columns:
-                date_col = col
-                break
+            # 브랜드별 시계열 추이
+            date_col = cols['date']
         
-        if date_col:
-            st.markdown("#### 📈 브랜드별 매출 추이")
+            if date_col:
+                import plotly.express as px
+                st.markdown("#### 📈 브랜드별 매출 추이")
             
-            # 상위 5개 브랜드만 표시
-            top_5_brands = brand_sales.head(5)['브랜드'].tolist()
-            df_top5 = df[df['브랜드'].isin(top_5_brands)]
+                # 상위 5개 브랜드만 표시
+                # category 코드 기반 정수 멤버십 검사 (행마다 문자열 해싱 제거)
+                top_5_brands = brand_sales.head(5)['브랜드'].tolist()
+                brand_series = df['브랜드']
+                if isinstance(brand_series.dtype, pd.CategoricalDtype):
+                    cats = brand_series.cat.categories
+                    top_codes = np.array(
+                        [cats.get_loc(b) for b in top_5_brands if b in cats],
+                        dtype=np.int32)
+                    df_top5 = df[np.isin(brand_series.cat.codes.to_numpy(), top_codes)]
+                else:
+                    df_top5 = df[brand_series.isin(top_5_brands)]
             
-            brand_trend = analyze_brand_trend(df_top5, date_col, '브랜드', amount_col, 'M')
+                brand_trend = analyze_brand_trend(df_top5, date_col, '브랜드', amount_col, 'M')
             
-            if brand_trend is not None:
-                fig4 = px.line(
-                    brand_trend,
-                    x=date_col,
-                    y='매출액',
-                    color='브랜드',
-                    title="상위 5개 브랜드 월별 매출 추이",
-                    markers=True
-                )
-                fig4.update_layout(
-                    xaxis_title="날짜",
-                    yaxis_title="매출액 (원)",
-                    hovermode='x unified'
-                )
-                fig4.update_yaxes(tickformat=",")
-                st.plotly_chart(fig4, use_container_width=True)
+                if brand_trend is not None:
+                    fig4 = px.line(
+                        brand_trend,
+                        x=date_col,
+                        y='매출액',
+                        color='브랜드',
+                        title="상위 5개 브랜드 월별 매출 추이",
+                        markers=True
+                    )
+                    fig4.update_layout(
+                        xaxis_title="날짜",
+                        yaxis_title="매출액 (원)",
+                        hovermode='x unified'
+                    )
+                    fig4.update_yaxes(tickformat=",")
+                    show_chart(fig4)
             
-            # 브랜드별 성장률
-            st.markdown("#### 🚀 브랜드별 성장률 (최근 6개월 vs 이전 6개월)")
-            growth_df = compare_brand_growth(df, date_col, '브랜드', amount_col, 6)
+                # 브랜드별 성장률
+                st.markdown("#### 🚀 브랜드별 성장률 (최근 6개월 vs 이전 6개월)")
+                growth_df = compare_brand_growth(df, date_col, '브랜드', amount_col, 6)
             
-            if growth_df is not None and len(growth_df) > 0:
-                # 상위 10개만 표시
-                growth_df_display = growth_df.head(10)
+                if growth_df is not None and len(growth_df) > 0:
+                    # 상위 10개만 표시
+                    growth_df_display = growth_df.head(10)
                 
-                # 포맷팅된 데이터프레임 표시 (background_gradient 제거)
-                styled_df = growth_df_display.copy()
-                # 숫자 포맷팅
-                for col in ['최근6개월', '이전6개월', '성장액']:
-                    if col in styled_df.columns:
-                        styled_df[col] = styled_df[col].apply(lambda x: f"{x:,.0f}" if pd.notna(x) else "")
-                if '성장률(%)' in styled_df.columns:
-                    styled_df['성장률(%)'] = styled_df['성장률(%)'].apply(lambda x: f"{x:.2f}%" if pd.notna(x) else "")
-                
-                st.dataframe(styled_df, use_container_width=True)
-        
-        # 상세 데이터 테이블
-        st.markdown("#### 📋 브랜드별 상세 데이터")
-        # 포맷팅된 데이터프레임 표시
-        styled_brand_sales = brand_sales.copy()
-        for col in ['총매출액', '평균단가', '최대금액', '최소금액']:
-            if col in styled_brand_sales.columns:
-                styled_brand_sales[col] = styled_brand_sales[col].apply(lambda x: f"{x:,.0f}" if pd.notna(x) else "")
-        for col in ['매출비중(%)', '누적비중(%)']:
-            if col in styled_brand_sales.columns:
-                styled_brand_sales[col] = styled_brand_sales[col].apply(lambda x: f"{x:.2f}" if pd.notna(x) else "")
-        
-        st.dataframe(styled_brand_sales, use_container_width=True)
-        
-        # 특정 브랜드 상세 분석
-        st.markdown("---")
-        st.markdown("#### 🔍 특정 브랜드 상세 분석")
+                    # 숫자 dtype을 유지한 채 표시 포맷 + 성장률 히트 셰이딩 적용
+                    styled_growth = growth_df_display.style.format({
+                        '최근6개월': '{:,.0f}',
+                        '이전6개월': '{:,.0f}',
+                        '성장액': '{:,.0f}',
+                        '성장률(%)': '{:.2f}%'
+                    }, na_rep='')
+                    if importlib.util.find_spec('matplotlib') is not None:
+                        styled_growth = styled_growth.background_gradient(
+                            subset=['성장률(%)'], cmap='RdYlGn')
+                    st.dataframe(styled_growth, use_container_width=True)
         
-        selected_brand = st.selectbox(
-            "분석할 브랜드 선택",
-            options=brand_sales['브랜드'].tolist()
-        )
+            # 상세 데이터 테이블 (숫자 dtype 유지, 표시 포맷만 적용)
+            st.markdown("#### 📋 브랜드별 상세 데이터")
+            st.dataframe(
+                brand_sales.style.format({
+                    '총매출액': '{:,.0f}',
+                    '평균단가': '{:,.0f}',
+                    '최대금액': '{:,.0f}',
+                    '최소금액': '{:,.0f}',
+                    '매출비중(%)': '{:.2f}%',
+                    '누적비중(%)': '{:.2f}%'
+                }, na_rep=''),
+                use_container_width=True
+            )
         
-        if selected_brand:
-            product_col = None
-            for col in ['품명 및 규격', '품목명', '제품명', '상품명', '품명', '품목', '제품', '상품', '아이템', '물품', 'Product', 'Item']:
-                if col in df.columns:
-                    product_col = col
-                    break
-            
-            if product_col:
-                brand_products = get_brand_product_detail(
-                    df, selected_brand, '브랜드', product_col, amount_col, 10
+            # 특정 브랜드 상세 분석
+            # 브랜드 선택 변경 시 위의 파레토/추이 차트 재구성 없이
+            # 이 하위 섹션만 rerun (st.fragment)
+            st.markdown("---")
+            st.markdown("#### 🔍 특정 브랜드 상세 분석")
+
+            @st.fragment
+            def _brand_detail():
+                selected_brand = st.selectbox(
+                    "분석할 브랜드 선택",
+                    options=brand_sales['브랜드'].tolist()
                 )
+
+                if selected_brand:
+                    product_col = cols['product']
+            
+                    if product_col:
+                        # 캐시된 그룹 인덱스로 해당 브랜드 행만 슬라이스
+                        # (브랜드 변경 시 전체 프레임 불리언 마스크 + 재그룹화 생략)
+                        idx = _brand_indices(st.session_state['sales_sig']).get(selected_brand)
+                        brand_df = df.iloc[idx] if idx is not None else df
+                        brand_products = get_brand_product_detail(
+                            brand_df, selected_brand, '브랜드', product_col, amount_col, 10
+                        )
                 
-                if brand_products is not None and len(brand_products) > 0:
-                    st.markdown(f"##### 📦 {selected_brand} 브랜드 제품별 매출 Top 10")
+                        if brand_products is not None and len(brand_products) > 0:
+                            st.markdown(f"##### 📦 {selected_brand} 브랜드 제품별 매출 Top 10")
                     
-                    col1, col2 = st.columns(2)
+                            col1, col2 = st.columns(2)
                     
-                    with col1:
-                        # 제품별 매출 차트
-                        fig5 = create_bar_chart(
-                            brand_products,
-                            product_col,
-                            '총매출액',
-                            f"{selected_brand} 제품별 매출",
-                            'h'
-                        )
-                        st.plotly_chart(fig5, use_container_width=True)
+                            with col1:
+                                # 제품별 매출 차트
+                                fig5 = _charts().create_bar_chart(
+                                    brand_products,
+                                    product_col,
+                                    '총매출액',
+                                    f"{selected_brand} 제품별 매출",
+                                    'h'
+                                )
+                                show_chart(fig5)
                     
-                    with col2:
-                        # 제품별 비중
-                        fig6 = create_pie_chart(
-                            brand_products,
-                            product_col,
-                            '총매출액',
-                            f"{selected_brand} 제품 구성"
-                        )
-                        st.plotly_chart(fig6, use_container_width=True)
+                            with col2:
+                                # 제품별 비중
+                                fig6 = _charts().create_pie_chart(
+                                    brand_products,
+                                    product_col,
+                                    '총매출액',
+                                    f"{selected_brand} 제품 구성"
+                                )
+                                show_chart(fig6)
                     
-                    # 상세 테이블
-                    # 포맷팅된 데이터프레임 표시
-                    styled_brand_prod = brand_products.copy()
-                    for col in ['총매출액', '평균단가']:
-                        if col in styled_brand_prod.columns:
-                            styled_brand_prod[col] = styled_brand_prod[col].apply(lambda x: f"{x:,.0f}" if pd.notna(x) else "")
-                    if '브랜드내뺄중(%)' in styled_brand_prod.columns:
-                        styled_brand_prod['브랜드내뺄중(%)'] = styled_brand_prod['브랜드내뺄중(%)'].apply(lambda x: f"{x:.2f}%" if pd.notna(x) else "")
-                    st.dataframe(styled_brand_prod, use_container_width=True)
+                            # 상세 테이블 (숫자 dtype 유지, 표시 포맷만 적용)
+                            st.dataframe(
+                                brand_products.style.format({
+                                    '총매출액': '{:,.0f}',
+                                    '평균단가': '{:,.0f}',
+                                    '브랜드내비중(%)': '{:.2f}%'
+                                }, na_rep=''),
+                                use_container_width=True
+                            )
+
+            _brand_detail()
+
+    _render()
 
 
 # 앱 실행
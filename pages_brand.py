@@ -1,8 +1,18 @@
 """
 브랜드 분석 페이지 (app.py에 추가할 함수)
+
+NOTE: 의도적으로 동결된 레거시 변형. 이 모듈은 브랜드 페이지가 app.py에
+통합되기 전의 사본으로, 앱 어디에서도 임포트되지 않는다. 병합 매출
+데이터를 session_state의 'merged_sales_df' 키에 두던 과거 저장 방식을
+그대로 전제하며(현재 app.py는 cache_resource 홀더 + 파일 시그니처 방식),
+여기의 sales_version 키 캐시도 그 전제 안에서만 동작한다. app.py로의
+마이그레이션은 모듈 최상위에서 Streamlit 스크립트를 실행하는 app.py를
+임포트해야 하므로 하지 않는다 — 이 파일을 재사용하려면 함수 본문을
+앱 쪽으로 옮겨 현재 저장 방식에 맞출 것.
 """
 import streamlit as st
 import pandas as pd
+from utils.column_resolver import resolve_columns
 from utils.brand_analysis import (
     load_brand_list,
     add_brand_column,
@@ -20,6 +30,28 @@ from utils.charts import (
 )
 
 
+# 분석 결과 캐싱 래퍼
+# 업로드 시마다 증가하는 sales_version을 캐시 키로 사용하여 DataFrame 해싱
+# 비용 없이, 슬라이더 조작 등 rerun 간 groupby/agg 재계산을 생략
+@st.cache_data(show_spinner=False, max_entries=8)
+def _brand_sales(version: int, amount_col: str, top_n: int) -> pd.DataFrame:
+    return analyze_sales_by_brand(
+        st.session_state['merged_sales_df'], '브랜드', amount_col, top_n)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _brand_trend(version: int, date_col: str, amount_col: str, brands: tuple) -> pd.DataFrame:
+    df = st.session_state['merged_sales_df']
+    df_top = df[df['브랜드'].isin(brands)]
+    return analyze_brand_trend(df_top, date_col, '브랜드', amount_col, 'M')
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _brand_growth(version: int, date_col: str, amount_col: str, months: int) -> pd.DataFrame:
+    return compare_brand_growth(
+        st.session_state['merged_sales_df'], date_col, '브랜드', amount_col, months)
+
+
 def page_brand_upload():
     """브랜드 리스트 업로드 페이지"""
     st.markdown('<div class="sub-header">🏷️ 브랜드 리스트 업로드</div>', unsafe_allow_html=True)
@@ -67,16 +99,21 @@ def page_brand_upload():
                     with st.spinner("매출 데이터에 브랜드 정보 추가 중..."):
                         sales_df = st.session_state['merged_sales_df'].copy()
                         
-                        # 제품 컬럼 찾기
-                        product_col = None
-                        for col in ['품목명', '제품명', '상품명', '품명']:
-                            if col in sales_df.columns:
-                                product_col = col
-                                break
+                        # 역할별 컬럼을 한 번에 확정해 저장
+                        st.session_state['cols'] = resolve_columns(sales_df)
+                        product_col = st.session_state['cols']['product']
                         
                         if product_col:
                             sales_df = add_brand_column(sales_df, brand_list, product_col)
+                            # groupby 키 컬럼을 category로 변환해 정수 코드 기반
+                            # 해싱으로 동작하도록 함 (메모리도 크게 절약)
+                            for c in ('브랜드', '거래처명', product_col):
+                                if c in sales_df.columns:
+                                    sales_df[c] = sales_df[c].astype('category')
                             st.session_state['merged_sales_df'] = sales_df
+                            # 캐시 무효화용 버전 증가
+                            st.session_state['sales_version'] = (
+                                st.session_state.get('sales_version', 0) + 1)
                             
                             # 브랜드 통계
                             brand_stats = get_brand_statistics(sales_df, '브랜드')
@@ -120,12 +157,9 @@ def page_brand_analysis():
         st.error("❌ 매출 데이터에 브랜드 정보가 없습니다. 브랜드 리스트를 다시 업로드해주세요.")
         return
     
-    # 금액 컬럼 찾기
-    amount_col = None
-    for col in ['공급가액', '금액', '합계금액', '매출금액']:
-        if col in df.columns:
-            amount_col = col
-            break
+    # 금액 컬럼 찾기 (업로드 시 확정된 역할 dict 재사용)
+    cols = st.session_state.get('cols') or resolve_columns(df)
+    amount_col = cols['amount']
     
     if not amount_col:
         st.error("❌ 금액 컬럼을 찾을 수 없습니다.")
@@ -134,8 +168,9 @@ def page_brand_analysis():
     # 분석 옵션
     top_n = st.slider("상위 브랜드 수", 5, 30, 15)
     
-    # 브랜드별 매출 분석
-    brand_sales = analyze_sales_by_brand(df, '브랜드', amount_col, top_n)
+    # 브랜드별 매출 분석 (버전 키 캐시)
+    version = st.session_state.get('sales_version', 0)
+    brand_sales = _brand_sales(version, amount_col, top_n)
     
     if brand_sales is not None:
         # 주요 메트릭
@@ -192,20 +227,14 @@ def page_brand_analysis():
             st.plotly_chart(fig3, use_container_width=True)
         
         # 브랜드별 시계열 추이
-        date_col = None
-        for col in ['날짜', '일자', '전표일자', '판매일자', '거래일자']:
-            if col in df.columns:
-                date_col = col
-                break
+        date_col = cols['date']
         
         if date_col:
             st.markdown("#### 📈 브랜드별 매출 추이")
             
             # 상위 5개 브랜드만 표시
             top_5_brands = brand_sales.head(5)['브랜드'].tolist()
-            df_top5 = df[df['브랜드'].isin(top_5_brands)]
-            
-            brand_trend = analyze_brand_trend(df_top5, date_col, '브랜드', amount_col, 'M')
+            brand_trend = _brand_trend(version, date_col, amount_col, tuple(top_5_brands))
             
             if brand_trend is not None:
                 import plotly.express as px
@@ -227,7 +256,7 @@ def page_brand_analysis():
             
             # 브랜드별 성장률
             st.markdown("#### 🚀 브랜드별 성장률 (최근 6개월 vs 이전 6개월)")
-            growth_df = compare_brand_growth(df, date_col, '브랜드', amount_col, 6)
+            growth_df = _brand_growth(version, date_col, amount_col, 6)
             
             if growth_df is not None and len(growth_df) > 0:
                 # 상위 10개만 표시
@@ -267,11 +296,7 @@ def page_brand_analysis():
         )
         
         if selected_brand:
-            product_col = None
-            for col in ['품목명', '제품명', '상품명', '품명']:
-                if col in df.columns:
-                    product_col = col
-                    break
+            product_col = cols['product']
             
             if product_col:
                 brand_products = get_brand_product_detail(
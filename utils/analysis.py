@@ -7,6 +7,19 @@ from typing import Dict, List, Tuple
 from datetime import datetime, timedelta
 
 
+def _ensure_datetime(series: pd.Series) -> pd.Series:
+    """날짜 Series를 datetime dtype으로 보장
+
+    업로드 시 clean_and_prepare_data가 이미 변환해 두므로 보통은 그대로
+    반환되며, 문자열로 들어온 경우에만 지역 Series로 변환한다
+    (전체 DataFrame 복사 없이 O(N) 할당 1회로 제한, cache=True로 중복
+    날짜 문자열 파싱 제거).
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    return pd.to_datetime(series, errors='coerce', cache=True)
+
+
 def analyze_sales_by_period(df: pd.DataFrame, 
                             date_col: str = '날짜',
                             amount_col: str = '공급가액',
@@ -26,11 +39,13 @@ def analyze_sales_by_period(df: pd.DataFrame,
     if date_col not in df.columns or amount_col not in df.columns:
         return None
     
-    df_copy = df.copy()
-    df_copy[date_col] = pd.to_datetime(df_copy[date_col])
+    dates = _ensure_datetime(df[date_col])
     
-    # 기간별 그룹화
-    period_sales = df_copy.groupby(pd.Grouper(key=date_col, freq=period))[amount_col].agg([
+    # 기간별 그룹화 (날짜/금액 두 컬럼만으로 구성한 좁은 프레임 사용)
+    period_sales = pd.DataFrame({
+        date_col: dates,
+        amount_col: df[amount_col]
+    }).groupby(pd.Grouper(key=date_col, freq=period))[amount_col].agg([
         ('매출액', 'sum'),
         ('거래건수', 'count'),
         ('평균거래액', 'mean')
@@ -58,23 +73,27 @@ def analyze_sales_by_client(df: pd.DataFrame,
     if client_col not in df.columns or amount_col not in df.columns:
         return None
     
-    client_sales = df.groupby(client_col)[amount_col].agg([
-        ('총매출액', 'sum'),
-        ('거래건수', 'count'),
-        ('평균거래액', 'mean'),
-        ('최대거래액', 'max'),
-        ('최소거래액', 'min')
-    ]).reset_index()
-    
-    # 매출 비중 계산
-    total_sales = client_sales['총매출액'].sum()
-    client_sales['매출비중(%)'] = (client_sales['총매출액'] / total_sales * 100).round(2)
-    
-    # 누적 비중 계산
-    client_sales = client_sales.sort_values('총매출액', ascending=False)
-    client_sales['누적비중(%)'] = client_sales['매출비중(%)'].cumsum().round(2)
-    
-    return client_sales.head(top_n)
+    # 필요한 두 컬럼만 투영하여 그룹 연산의 메모리 트래픽 축소
+    # as_index=False: 그룹 키가 바로 컬럼으로 생성되어 reset_index 복사 제거
+    client_sales = df[[client_col, amount_col]].groupby(
+        client_col, as_index=False, observed=True, sort=False).agg(
+        총매출액=(amount_col, 'sum'),
+        거래건수=(amount_col, 'count'),
+        평균거래액=(amount_col, 'mean'),
+        최대거래액=(amount_col, 'max'),
+        최소거래액=(amount_col, 'min'))
+    
+    # 매출 비중 계산 (C-연속 ndarray 위에서 단일 패스, 중간 Series 할당 제거)
+    vals = client_sales['총매출액'].to_numpy()
+    inv_total = 100.0 / vals.sum()
+    client_sales['매출비중(%)'] = np.round(vals * inv_total, 2)
+    
+    # 상위 top_n만 힙 기반 부분 선택 (전체 키 정렬 생략)
+    # 누적비중은 반올림 전 비중을 누적해 오차 전파를 방지
+    top = client_sales.nlargest(top_n, '총매출액')
+    top['누적비중(%)'] = np.round(np.cumsum(top['총매출액'].to_numpy() * inv_total), 2)
+    
+    return top
 
 
 def analyze_sales_by_product(df: pd.DataFrame,
@@ -96,19 +115,20 @@ def analyze_sales_by_product(df: pd.DataFrame,
     if product_col not in df.columns or amount_col not in df.columns:
         return None
     
-    product_sales = df.groupby(product_col)[amount_col].agg([
-        ('총매출액', 'sum'),
-        ('판매건수', 'count'),
-        ('평균단가', 'mean')
-    ]).reset_index()
-    
-    # 매출 비중 계산
-    total_sales = product_sales['총매출액'].sum()
-    product_sales['매출비중(%)'] = (product_sales['총매출액'] / total_sales * 100).round(2)
+    # 필요한 두 컬럼만 투영하여 그룹 연산의 메모리 트래픽 축소
+    # as_index=False: 그룹 키가 바로 컬럼으로 생성되어 reset_index 복사 제거
+    product_sales = df[[product_col, amount_col]].groupby(
+        product_col, as_index=False, observed=True, sort=False).agg(
+        총매출액=(amount_col, 'sum'),
+        판매건수=(amount_col, 'count'),
+        평균단가=(amount_col, 'mean'))
     
-    product_sales = product_sales.sort_values('총매출액', ascending=False)
+    # 매출 비중 계산 (C-연속 ndarray 위에서 단일 패스)
+    vals = product_sales['총매출액'].to_numpy()
+    product_sales['매출비중(%)'] = np.round(vals * (100.0 / vals.sum()), 2)
     
-    return product_sales.head(top_n)
+    # 상위 top_n만 힙 기반 부분 선택 (전체 키 정렬 생략)
+    return product_sales.nlargest(top_n, '총매출액')
 
 
 def calculate_growth_rate(df: pd.DataFrame,
@@ -130,11 +150,13 @@ def calculate_growth_rate(df: pd.DataFrame,
     if date_col not in df.columns or amount_col not in df.columns:
         return None
     
-    df_copy = df.copy()
-    df_copy[date_col] = pd.to_datetime(df_copy[date_col])
+    dates = _ensure_datetime(df[date_col])
     
     # 기간별 매출 집계
-    period_sales = df_copy.groupby(pd.Grouper(key=date_col, freq=period))[amount_col].sum().reset_index()
+    period_sales = pd.DataFrame({
+        date_col: dates,
+        amount_col: df[amount_col]
+    }).groupby(pd.Grouper(key=date_col, freq=period))[amount_col].sum().reset_index()
     
     # 전기 대비 성장률
     period_sales['전기매출'] = period_sales[amount_col].shift(1)
@@ -167,11 +189,13 @@ def predict_future_sales(df: pd.DataFrame,
     if date_col not in df.columns or amount_col not in df.columns:
         return None
     
-    df_copy = df.copy()
-    df_copy[date_col] = pd.to_datetime(df_copy[date_col])
+    dates = _ensure_datetime(df[date_col])
     
     # 월별 매출 집계
-    monthly_sales = df_copy.groupby(pd.Grouper(key=date_col, freq='M'))[amount_col].sum()
+    monthly_sales = pd.DataFrame({
+        date_col: dates,
+        amount_col: df[amount_col]
+    }).groupby(pd.Grouper(key=date_col, freq='M'))[amount_col].sum()
     
     # 최근 3개월, 6개월, 12개월 평균
     avg_3m = monthly_sales.tail(3).mean()
@@ -179,12 +203,16 @@ def predict_future_sales(df: pd.DataFrame,
     avg_12m = monthly_sales.tail(12).mean()
     
     # 추세 계산 (선형 회귀)
+    # Arrow 확장 배열이 올 수 있으므로 numpy float 배열로 변환 후 계산
     x = np.arange(len(monthly_sales))
-    y = monthly_sales.values
+    y = monthly_sales.to_numpy(dtype='float64')
     
     if len(x) > 1:
-        coefficients = np.polyfit(x, y, 1)
-        trend_slope = coefficients[0]
+        # 1차 추세 기울기는 폐형식으로 계산
+        # (polyfit의 Vandermonde 행렬 + lstsq 호출 대신 단일 패스)
+        x_mean = x.mean()
+        y_mean = y.mean()
+        trend_slope = ((x - x_mean) * (y - y_mean)).sum() / ((x - x_mean) ** 2).sum()
         
         # 예측값 계산
         last_date = monthly_sales.index[-1]
@@ -230,26 +258,41 @@ def get_top_growing_clients(df: pd.DataFrame,
     if date_col not in df.columns or client_col not in df.columns or amount_col not in df.columns:
         return None
     
-    df_copy = df.copy()
-    df_copy[date_col] = pd.to_datetime(df_copy[date_col])
+    dates = _ensure_datetime(df[date_col])
     
     # 최근 6개월과 이전 6개월 비교
-    max_date = df_copy[date_col].max()
+    max_date = dates.max()
     recent_6m_start = max_date - pd.DateOffset(months=6)
     prev_6m_start = max_date - pd.DateOffset(months=12)
     prev_6m_end = recent_6m_start
     
-    # 최근 6개월 매출
-    recent_sales = df_copy[df_copy[date_col] >= recent_6m_start].groupby(client_col)[amount_col].sum()
-    
-    # 이전 6개월 매출
-    prev_sales = df_copy[(df_copy[date_col] >= prev_6m_start) & (df_copy[date_col] < prev_6m_end)].groupby(client_col)[amount_col].sum()
-    
-    # 성장률 계산
-    growth_df = pd.DataFrame({
-        '최근6개월매출': recent_sales,
-        '이전6개월매출': prev_sales
-    })
+    # 기간 라벨을 붙여 한 번의 groupby로 두 구간을 동시 집계
+    # (마스크 2회 + groupby 2회 대신 금액 컬럼 한 번만 스캔)
+    if dates.is_monotonic_increasing:
+        # 업로드 시 날짜로 정렬되어 있으면 구간 경계를 이진 탐색으로 찾아
+        # 전체 컬럼 불리언 마스크 대신 연속 슬라이스 사용
+        date_vals = dates.to_numpy()
+        bounds = np.array([prev_6m_start, recent_6m_start], dtype=date_vals.dtype)
+        p0, p1 = np.searchsorted(date_vals, bounds)
+        window = df.iloc[p0:][[client_col, amount_col]]
+        labels = np.where(np.arange(p0, len(df)) >= p1, '최근6개월매출', '이전6개월매출')
+    else:
+        period_label = np.where(
+            dates >= recent_6m_start, '최근6개월매출',
+            np.where((dates >= prev_6m_start) & (dates < prev_6m_end), '이전6개월매출', ''))
+        mask = period_label != ''
+        window = df.loc[mask, [client_col, amount_col]]
+        labels = period_label[mask]
+    
+    # 성장률 계산 (구간이 비는 거래처는 NaN 유지 — 기존 외부 조인과 동일)
+    growth_df = (
+        window.assign(구간=labels)
+              .groupby([client_col, '구간'], observed=True, sort=False)[amount_col]
+              .sum()
+              .unstack('구간')
+              .reindex(columns=['최근6개월매출', '이전6개월매출'])
+    )
+    growth_df.columns.name = None
     
     growth_df['성장률(%)'] = ((growth_df['최근6개월매출'] - growth_df['이전6개월매출']) / growth_df['이전6개월매출'] * 100).round(2)
     growth_df = growth_df.sort_values('성장률(%)', ascending=False)
@@ -1,12 +1,43 @@
 """
 차트 생성 함수들
+
+각 빌더는 st.cache_data로 메모이제이션된다: 입력(집계 결과 프레임 +
+파라미터)이 같으면 Figure 구성과 JSON 직렬화를 건너뛰고 캐시된 사본을
+반환한다 (캐시는 호출마다 역직렬화된 새 객체를 주므로 변이에도 안전).
 """
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
+import streamlit as st
 from typing import Dict, List
 
 
+def _downsample_timeseries(df: pd.DataFrame, x_col: str, y_col: str,
+                           n_out: int = 2000) -> pd.DataFrame:
+    """고밀도 시계열을 그리기 전에 n_out 포인트 이하로 다운샘플
+
+    일별 분석 등에서 포인트가 수만 개가 되면 Plotly 렌더링이 급격히
+    느려지므로, tsdownsample의 LTTB로 화면 해상도 수준까지 줄인다.
+    범주형 x축 차트(파레토 등)에는 적용하지 않는다 — 전역
+    register_plotly_resampler가 그런 차트까지 패치해 깨뜨리는 문제로
+    시계열 빌더 내부에서만 수행.
+    """
+    if len(df) <= n_out:
+        return df
+    try:
+        from tsdownsample import LTTBDownsampler
+        x = pd.to_datetime(df[x_col]).to_numpy()
+        y = df[y_col].to_numpy(dtype='float64')
+        idx = LTTBDownsampler().downsample(x, y, n_out=n_out)
+        return df.iloc[idx]
+    except Exception:
+        # tsdownsample 미설치 또는 비수치 데이터 — 등간격 스트라이드 폴백
+        step = max(1, len(df) // n_out)
+        return df.iloc[::step]
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
 def create_line_chart(df: pd.DataFrame, 
                      x_col: str, 
                      y_col: str,
@@ -15,9 +46,14 @@ def create_line_chart(df: pd.DataFrame,
     """
     시계열 라인 차트 생성
     """
-    fig = px.line(df, x=x_col, y=y_col, 
+    # 고밀도 시계열은 LTTB로 다운샘플 후 렌더링
+    df = _downsample_timeseries(df, x_col, y_col)
+
+    # WebGL 렌더링: 포인트가 많아도 SVG DOM 노드 없이 캔버스에 그려짐
+    fig = px.line(df, x=x_col, y=y_col,
                   title=title,
-                  markers=True)
+                  markers=True,
+                  render_mode='webgl')
     
     fig.update_layout(
         xaxis_title="날짜",
@@ -32,6 +68,7 @@ def create_line_chart(df: pd.DataFrame,
     return fig
 
 
+@st.cache_data(show_spinner=False, max_entries=32)
 def create_bar_chart(df: pd.DataFrame,
                     x_col: str,
                     y_col: str,
@@ -59,6 +96,7 @@ def create_bar_chart(df: pd.DataFrame,
     return fig
 
 
+@st.cache_data(show_spinner=False, max_entries=32)
 def create_pie_chart(df: pd.DataFrame,
                     names_col: str,
                     values_col: str,
@@ -75,6 +113,7 @@ def create_pie_chart(df: pd.DataFrame,
     return fig
 
 
+@st.cache_data(show_spinner=False, max_entries=32)
 def create_stacked_bar_chart(df: pd.DataFrame,
                              x_col: str,
                              y_col: str,
@@ -99,6 +138,7 @@ def create_stacked_bar_chart(df: pd.DataFrame,
     return fig
 
 
+@st.cache_data(show_spinner=False, max_entries=32)
 def create_growth_chart(df: pd.DataFrame,
                        date_col: str,
                        amount_col: str,
@@ -151,6 +191,7 @@ def create_growth_chart(df: pd.DataFrame,
     return fig
 
 
+@st.cache_data(show_spinner=False, max_entries=32)
 def create_heatmap(df: pd.DataFrame,
                   x_col: str,
                   y_col: str,
@@ -159,14 +200,23 @@ def create_heatmap(df: pd.DataFrame,
     """
     히트맵 생성
     """
-    pivot_df = df.pivot(index=y_col, columns=x_col, values=z_col)
+    # pivot의 groupby/정렬 기계를 거치지 않고 factorize로 셀 좌표를 만든 뒤
+    # 밀집 2D 배열에 직접 채움
+    x_codes, x_uniq = pd.factorize(df[x_col], sort=True)
+    y_codes, y_uniq = pd.factorize(df[y_col], sort=True)
+    z = np.full((len(y_uniq), len(x_uniq)), np.nan)
+    # factorize는 NaN 키에 코드 -1을 주는데, 그대로 쓰면 마지막 행/열의
+    # 정상 셀을 덮어쓰므로 유효한 좌표만 기록
+    vals = df[z_col].to_numpy()
+    valid = (x_codes >= 0) & (y_codes >= 0)
+    z[y_codes[valid], x_codes[valid]] = vals[valid]
     
     fig = go.Figure(data=go.Heatmap(
-        z=pivot_df.values,
-        x=pivot_df.columns,
-        y=pivot_df.index,
+        z=z,
+        x=x_uniq,
+        y=y_uniq,
         colorscale='Blues',
-        text=pivot_df.values,
+        text=z,
         texttemplate='%{text:,.0f}',
         textfont={"size": 10},
         hoverongaps=False
@@ -181,6 +231,7 @@ def create_heatmap(df: pd.DataFrame,
     return fig
 
 
+@st.cache_data(show_spinner=False, max_entries=32)
 def create_prediction_chart(historical_df: pd.DataFrame,
                            prediction_data: List[Dict],
                            date_col: str,
@@ -191,7 +242,8 @@ def create_prediction_chart(historical_df: pd.DataFrame,
     """
     fig = go.Figure()
     
-    # 실적 데이터
+    # 실적 데이터 (고밀도 시계열은 LTTB로 다운샘플)
+    historical_df = _downsample_timeseries(historical_df, date_col, amount_col)
     fig.add_trace(go.Scatter(
         x=historical_df[date_col],
         y=historical_df[amount_col],
@@ -228,6 +280,7 @@ def create_prediction_chart(historical_df: pd.DataFrame,
     return fig
 
 
+@st.cache_data(show_spinner=False, max_entries=32)
 def create_pareto_chart(df: pd.DataFrame,
                        category_col: str,
                        value_col: str,
@@ -247,9 +300,9 @@ def create_pareto_chart(df: pd.DataFrame,
         marker_color='lightblue'
     ))
     
-    # 누적 비중 (선)
+    # 누적 비중 (선, WebGL)
     if cumulative_col and cumulative_col in df.columns:
-        fig.add_trace(go.Scatter(
+        fig.add_trace(go.Scattergl(
             x=df[category_col],
             y=df[cumulative_col],
             name='누적 비중',
@@ -0,0 +1,35 @@
+"""
+컬럼 역할(날짜/금액/거래처/제품) 자동 감지 유틸리티
+"""
+import pandas as pd
+from typing import Dict
+
+# 역할별 후보 컬럼명 (우선순위 순)
+DATE_ALIASES = ('일자', '날짜', '전표일자', '판매일자', '거래일자')
+AMOUNT_ALIASES = ('합계금액', '공급가액', '금액', '매출금액', '판매금액', '공급가', '판매가', '단가', '금액(공급가액)')
+CLIENT_ALIASES = ('거래처명', '판매처명', '거래처', '고객명')
+PRODUCT_ALIASES = ('품명 및 규격', '품목명', '제품명', '상품명', '품명', '품목', '제품', '상품', '아이템', '물품', 'Product', 'Item')
+
+
+def resolve_columns(df: pd.DataFrame) -> Dict[str, str]:
+    """
+    역할별로 첫 번째 매칭 컬럼명을 찾아 dict로 반환
+
+    업로드 시 한 번 호출해 결과를 session_state에 저장해 두면, 각 페이지의
+    선형 후보 탐색 루프가 O(1) dict 조회로 대체된다.
+
+    Args:
+        df: 매출 데이터프레임
+
+    Returns:
+        Dict[str, str]: {'date': ..., 'amount': ..., 'client': ...,
+                         'product': ..., 'brand': ...} (없는 역할은 None)
+    """
+    s = set(df.columns)
+    return {
+        'date': next((c for c in DATE_ALIASES if c in s), None),
+        'amount': next((c for c in AMOUNT_ALIASES if c in s), None),
+        'client': next((c for c in CLIENT_ALIASES if c in s), None),
+        'product': next((c for c in PRODUCT_ALIASES if c in s), None),
+        'brand': '브랜드' if '브랜드' in s else None,
+    }